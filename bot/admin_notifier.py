@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Admin Notifier for Olodymyr
+
+This module forwards error reports to the admin chat from a background
+worker, dropping repeats of the same error and rate-limiting sends so an
+error storm can't flood the admin chat or the Telegram API quota.
+"""
+
+import logging
+import asyncio
+from cachetools import TTLCache
+
+logger = logging.getLogger(__name__)
+
+class AdminNotifier:
+    """
+    Background, deduplicating sender of admin error notifications.
+    """
+
+    def __init__(self, bot, admin_chat_id, queue_size=100, dedup_seconds=60, min_interval=2.0):
+        """
+        Initialize the notifier.
+
+        Args:
+            bot: The Telegram bot used to send messages
+            admin_chat_id: Chat ID that receives the notifications
+            queue_size: Maximum number of notifications waiting to be sent
+            dedup_seconds: Window in which repeats of the same error are dropped
+            min_interval: Minimum seconds between two admin messages
+        """
+        self.bot = bot
+        self.admin_chat_id = admin_chat_id
+        self.min_interval = min_interval
+
+        self._queue = asyncio.Queue(maxsize=queue_size)
+        self._recent = TTLCache(maxsize=1024, ttl=dedup_seconds)
+        self._worker = None
+
+    def start(self):
+        """Start the background worker."""
+        if self._worker is None:
+            self._worker = asyncio.create_task(self._run())
+
+    def notify(self, signature, text):
+        """
+        Queue a notification without waiting for it to be sent.
+
+        Args:
+            signature: Hashable error signature used for deduplication
+            text: Notification text
+        """
+        try:
+            self._queue.put_nowait((signature, text))
+        except asyncio.QueueFull:
+            logger.warning("Admin notification queue full, dropping notification")
+
+    async def _run(self):
+        while True:
+            signature, text = await self._queue.get()
+
+            if signature in self._recent:
+                continue
+            self._recent[signature] = True
+
+            try:
+                await self.bot.send_message(self.admin_chat_id, text)
+            except Exception as e:
+                logger.error(f"Failed to send error message to admin: {e}")
+
+            await asyncio.sleep(self.min_interval)
@@ -11,33 +11,53 @@ received by the Telegram bot.
 
 import logging
 import asyncio
+import hashlib
 import traceback
 from telegram import Update
 from telegram.constants import ParseMode
 from telegram.ext import ContextTypes
+from llms.prompts import TEACHING_SYSTEM_PROMPT
+from bot.utils import send_chunked, stream_reply
+from tools.web_scraper import scrape_webpage
 
 logger = logging.getLogger(__name__)
 
+# Strong references to fire-and-forget tasks so they aren't garbage collected
+_background_tasks = set()
+
+def _run_in_background(coro):
+    """
+    Schedule a coroutine without awaiting it.
+    
+    Args:
+        coro: Coroutine to run
+        
+    Returns:
+        The created task
+    """
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
+
 # Command handlers
 
-async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE, **kwargs):
+async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE, *, personality_engine, allowed_user_ids=frozenset(), **kwargs):
     """
     Handle /start command - introduce the bot and its capabilities.
     
     Args:
         update: The update containing the command
         context: The context of the command
-        **kwargs: Additional dependencies (config, context_manager, etc.)
+        personality_engine: The personality engine
+        allowed_user_ids: IDs allowed to use the bot (empty allows everyone)
+        **kwargs: Other injected dependencies (unused)
     """
-    config = kwargs.get("config")
-    personality_engine = kwargs.get("personality_engine")
-    
     user = update.effective_user
     logger.info(f"User {user.id} started the bot")
     
     # Check if user is allowed (if whitelist is enabled)
-    allowed_users = config["telegram"].get("allowed_users", [])
-    if allowed_users and str(user.id) not in allowed_users:
+    if allowed_user_ids and user.id not in allowed_user_ids:
         logger.warning(f"Unauthorized access attempt by user {user.id}")
         await update.message.reply_text(
             "Sorry, you are not authorized to use this bot."
@@ -52,16 +72,16 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE, **kw
         parse_mode=ParseMode.MARKDOWN
     )
 
-async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE, **kwargs):
+async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE, *, personality_engine, **kwargs):
     """
     Handle /help command - provide information about available commands.
     
     Args:
         update: The update containing the command
         context: The context of the command
-        **kwargs: Additional dependencies
+        personality_engine: The personality engine
+        **kwargs: Other injected dependencies (unused)
     """
-    personality_engine = kwargs.get("personality_engine")
     help_message = personality_engine.get_help_message()
     
     await update.message.reply_text(
@@ -69,7 +89,7 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE, **kwa
         parse_mode=ParseMode.MARKDOWN
     )
 
-async def learn_command(update: Update, context: ContextTypes.DEFAULT_TYPE, **kwargs):
+async def learn_command(update: Update, context: ContextTypes.DEFAULT_TYPE, *, config, learning_engine, semantic_cache=None, **kwargs):
     """
     Handle /learn command - create a new learning session.
     
@@ -78,11 +98,11 @@ async def learn_command(update: Update, context: ContextTypes.DEFAULT_TYPE, **kw
     Args:
         update: The update containing the command
         context: The context of the command
-        **kwargs: Additional dependencies
+        config: The bot configuration
+        learning_engine: The learning and memory system
+        semantic_cache: Optional semantic response cache
+        **kwargs: Other injected dependencies (unused)
     """
-    learning_engine = kwargs.get("learning_engine")
-    config = kwargs.get("config")
-    
     # Parse arguments
     args = context.args
     if len(args) < 2:
@@ -95,7 +115,7 @@ async def learn_command(update: Update, context: ContextTypes.DEFAULT_TYPE, **kw
     
     session_name = args[0]
     content = " ".join(args[1:])
-    user_id = str(update.effective_user.id)
+    user_id = update.effective_user.id
     
     # Check if content is a URL and scraping is enabled
     if content.startswith("http") and config["features"].get("web_scraping", True):
@@ -103,11 +123,11 @@ async def learn_command(update: Update, context: ContextTypes.DEFAULT_TYPE, **kw
         processing_message = await update.message.reply_text("🔍 Processing web content. This may take a moment...")
         
         try:
-            # Import web scraper here to avoid circular imports
-            from tools.web_scraper import scrape_webpage
-            
-            # Scrape the webpage
-            scraped_content = await scrape_webpage(content)
+            # Scrape the webpage (bounded so a hung fetch can't pin a worker)
+            scraped_content = await asyncio.wait_for(
+                scrape_webpage(content),
+                timeout=config["features"].get("scrape_timeout", 30)
+            )
             
             # Store the scraped content
             session_id = await learning_engine.create_learning_session(
@@ -118,6 +138,10 @@ async def learn_command(update: Update, context: ContextTypes.DEFAULT_TYPE, **kw
                 source=content
             )
             
+            # Earlier answers didn't know about the new content
+            if semantic_cache:
+                await semantic_cache.invalidate(user_id)
+            
             await processing_message.edit_text(
                 f"✅ Successfully learned content from {content}\n\n"
                 f"Stored as: *{session_name}*\n\n"
@@ -126,6 +150,13 @@ async def learn_command(update: Update, context: ContextTypes.DEFAULT_TYPE, **kw
                 parse_mode=ParseMode.MARKDOWN
             )
             
+        except asyncio.TimeoutError:
+            logger.error(f"Timed out scraping webpage: {content}")
+            await processing_message.edit_text(
+                f"❌ Failed to process the URL: {content}\n\n"
+                f"Error: the page took too long to load"
+            )
+            
         except Exception as e:
             logger.error(f"Error scraping webpage: {e}")
             await processing_message.edit_text(
@@ -142,6 +173,9 @@ async def learn_command(update: Update, context: ContextTypes.DEFAULT_TYPE, **kw
                 description=f"User-provided content"
             )
             
+            if semantic_cache:
+                await semantic_cache.invalidate(user_id)
+            
             await update.message.reply_text(
                 f"✅ Successfully stored information as: *{session_name}*\n\n"
                 f"You can recall this information using:\n"
@@ -155,7 +189,7 @@ async def learn_command(update: Update, context: ContextTypes.DEFAULT_TYPE, **kw
                 f"❌ Failed to store information: {str(e)}"
             )
 
-async def recall_command(update: Update, context: ContextTypes.DEFAULT_TYPE, **kwargs):
+async def recall_command(update: Update, context: ContextTypes.DEFAULT_TYPE, *, config, learning_engine, llm_client, **kwargs):
     """
     Handle /recall command - retrieve information from a learning session.
     
@@ -164,11 +198,11 @@ async def recall_command(update: Update, context: ContextTypes.DEFAULT_TYPE, **k
     Args:
         update: The update containing the command
         context: The context of the command
-        **kwargs: Additional dependencies
+        config: The bot configuration
+        learning_engine: The learning and memory system
+        llm_client: The LLM client for generating responses
+        **kwargs: Other injected dependencies (unused)
     """
-    learning_engine = kwargs.get("learning_engine")
-    llm_client = kwargs.get("llm_client")
-    
     # Parse arguments
     args = context.args
     if not args:
@@ -180,7 +214,7 @@ async def recall_command(update: Update, context: ContextTypes.DEFAULT_TYPE, **k
         return
     
     session_name = args[0]
-    user_id = str(update.effective_user.id)
+    user_id = update.effective_user.id
     
     # Show typing indication
     await update.message.chat.send_action("typing")
@@ -197,28 +231,34 @@ async def recall_command(update: Update, context: ContextTypes.DEFAULT_TYPE, **k
             return
         
         # Generate a teaching response based on the session content
-        teaching_prompt = f"""
-        You are Olodymyr, an educational AI assistant. 
-        You need to explain the following information in a clear, educational way, 
-        as if you're a friendly professor teaching a student. 
-        Use examples where appropriate and organize your explanation well.
-        
-        Here is the information to explain:
-        
-        {session['content']}
-        
-        Remember to keep a friendly tone, use moderate emojis where appropriate, 
-        and make the explanation engaging and easy to understand.
-        """
-        
-        # Generate response
-        response = await llm_client.generate_completion(teaching_prompt)
+        teaching_prompt = f"Here is the information to explain:\n\n{session['content']}"
         
-        # Format and send the response
-        await update.message.reply_text(
-            f"📚 *{session_name}*\n\n{response}",
-            parse_mode=ParseMode.MARKDOWN
-        )
+        # Generate response (static instructions go first as a cacheable prefix)
+        if config["features"].get("stream_responses", True):
+            # Show the explanation as it is generated
+            await stream_reply(
+                update.message,
+                llm_client.generate_completion_stream(
+                    teaching_prompt,
+                    system=TEACHING_SYSTEM_PROMPT,
+                    cache_prefix=True
+                ),
+                ParseMode.MARKDOWN,
+                header=f"📚 *{session_name}*\n\n"
+            )
+        else:
+            response = await llm_client.generate_completion(
+                teaching_prompt,
+                system=TEACHING_SYSTEM_PROMPT,
+                cache_prefix=True
+            )
+            
+            # Format and send the response
+            await send_chunked(
+                update.message,
+                f"📚 *{session_name}*\n\n{response}",
+                ParseMode.MARKDOWN
+            )
         
     except Exception as e:
         logger.error(f"Error recalling learning session: {e}")
@@ -226,50 +266,54 @@ async def recall_command(update: Update, context: ContextTypes.DEFAULT_TYPE, **k
             f"❌ Error retrieving information: {str(e)}"
         )
 
-async def clear_command(update: Update, context: ContextTypes.DEFAULT_TYPE, **kwargs):
+async def clear_command(update: Update, context: ContextTypes.DEFAULT_TYPE, *, context_manager, personality_engine, semantic_cache=None, **kwargs):
     """
     Handle /clear command - clear the current conversation context.
     
     Args:
         update: The update containing the command
         context: The context of the command
-        **kwargs: Additional dependencies
+        context_manager: The context management system
+        personality_engine: The personality engine
+        semantic_cache: Optional semantic response cache
+        **kwargs: Other injected dependencies (unused)
     """
-    context_manager = kwargs.get("context_manager")
-    user_id = str(update.effective_user.id)
+    user_id = update.effective_user.id
     
+    personality_engine.forget_history(user_id)
     await context_manager.clear_context(user_id)
+    if semantic_cache:
+        await semantic_cache.invalidate(user_id)
     await update.message.reply_text(
         "🧹 Conversation context cleared. Starting fresh!"
     )
 
 # Message handler
 
-async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE, **kwargs):
+async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE, *, config, context_manager, learning_engine, personality_engine, llm_client, semantic_cache=None, **kwargs):
     """
     Handle regular messages - process the message and generate a response.
     
     Args:
         update: The update containing the message
         context: The context of the message
-        **kwargs: Additional dependencies
+        config: The bot configuration
+        context_manager: The context management system
+        learning_engine: The learning and memory system
+        personality_engine: The personality engine
+        llm_client: The LLM client for generating responses
+        semantic_cache: Optional semantic response cache
+        **kwargs: Other injected dependencies (unused)
     """
-    config = kwargs.get("config")
-    context_manager = kwargs.get("context_manager")
-    learning_engine = kwargs.get("learning_engine")
-    personality_engine = kwargs.get("personality_engine")
-    llm_client = kwargs.get("llm_client")
-    
-    user_id = str(update.effective_user.id)
+    user_id = update.effective_user.id
     message_text = update.message.text
     
     # Show typing indication
     await update.message.chat.send_action("typing")
     
+    replied = False
+    
     try:
-        # Add user message to context
-        await context_manager.add_message(user_id, "user", message_text)
-        
         # Check for learning request
         if message_text.lower().startswith(("learn", "aprenda isso", "guarde isso")):
             # Extract learning content
@@ -292,45 +336,84 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE, **k
                 description="Content learned from chat"
             )
             
+            if semantic_cache:
+                await semantic_cache.invalidate(user_id)
+            
             response = f"✅ I've learned and stored this information! You can recall it using:\n/recall {session_name}"
             
         else:
-            # Get conversation context
-            conversation_history = await context_manager.get_context(user_id)
+            # Get conversation context and relevant memories (if any) concurrently
+            conversation_history, relevant_memories = await asyncio.gather(
+                context_manager.get_context(user_id),
+                learning_engine.get_relevant_memories(user_id, message_text)
+            )
             
-            # Get relevant memories (if any)
-            relevant_memories = await learning_engine.get_relevant_memories(user_id, message_text)
+            # Reuse the answer to a reworded earlier question, if any. A
+            # follow-up ("why?", "tell me more") depends on the turns before
+            # it, so only messages that open a conversation are matched
+            use_semantic_cache = semantic_cache is not None and not conversation_history
             
-            # Build the prompt with personality, context and relevant memories
-            prompt = personality_engine.build_prompt(
-                conversation_history=conversation_history,
-                relevant_memories=relevant_memories
-            )
+            response = None
+            if use_semantic_cache:
+                response = await semantic_cache.lookup(user_id, message_text)
             
-            # Generate response from LLM
-            response = await llm_client.generate_completion(prompt)
+            if response is None:
+                # Build the messages with personality, context and relevant
+                # memories; only the recent turns that fit the working memory
+                # budget are sent, the full history is still summarized
+                messages = personality_engine.build_prompt(
+                    conversation_history=context_manager.optimize_context(conversation_history),
+                    relevant_memories=relevant_memories,
+                    user_message=message_text,
+                    user_id=user_id
+                )
+                
+                # Fold old turns into the committed history for later requests
+                _run_in_background(personality_engine.commit_history(
+                    user_id, conversation_history, learning_engine
+                ))
+                
+                # Generate response from LLM
+                if config["features"].get("stream_responses", True):
+                    # Show the response as it is generated
+                    response = await stream_reply(
+                        update.message,
+                        llm_client.generate_completion_stream(
+                            messages=messages,
+                            cache_prefix=True
+                        ),
+                        ParseMode.MARKDOWN
+                    )
+                    replied = True
+                else:
+                    response = await llm_client.generate_completion(
+                        messages=messages,
+                        cache_prefix=True
+                    )
+                
+                if use_semantic_cache:
+                    await semantic_cache.insert(user_id, message_text, response)
         
-        # Add assistant response to context
-        await context_manager.add_message(user_id, "assistant", response)
+        # Store both turns in one write, in the background while the reply is sent
+        _run_in_background(context_manager.add_messages(user_id, [
+            {"role": "user", "content": message_text},
+            {"role": "assistant", "content": response}
+        ]))
         
         # Send the response (in chunks if needed due to Telegram's message size limit)
-        if len(response) > 4000:
-            chunks = [response[i:i+4000] for i in range(0, len(response), 4000)]
-            for chunk in chunks:
-                await update.message.reply_text(chunk, parse_mode=ParseMode.MARKDOWN)
-        else:
-            await update.message.reply_text(response, parse_mode=ParseMode.MARKDOWN)
+        if not replied:
+            await send_chunked(update.message, response, ParseMode.MARKDOWN)
             
-    except Exception as e:
-        logger.error(f"Error processing message: {e}")
-        logger.error(traceback.format_exc())
+    except Exception:
+        # Traceback formatting is deferred to the logging handler
+        logger.exception("Error processing message")
         await update.message.reply_text(
             "Sorry, I encountered an error while processing your message. Please try again."
         )
 
 # Error handler
 
-async def handle_error(update: Update, context: ContextTypes.DEFAULT_TYPE, config):
+async def handle_error(update: Update, context: ContextTypes.DEFAULT_TYPE, config, notifier=None):
     """
     Handle errors that occur during message processing.
     
@@ -338,9 +421,10 @@ async def handle_error(update: Update, context: ContextTypes.DEFAULT_TYPE, confi
         update: The update that caused the error
         context: The context in which the error occurred
         config: The bot configuration
+        notifier: Optional AdminNotifier that forwards errors to the admin chat
     """
-    logger.error(f"Exception while handling an update: {context.error}")
-    logger.error(traceback.format_exc())
+    error = context.error
+    logger.error("Exception while handling an update", exc_info=error)
     
     # Send error message to user if update is available
     if update is not None and update.effective_message is not None:
@@ -348,11 +432,11 @@ async def handle_error(update: Update, context: ContextTypes.DEFAULT_TYPE, confi
             "Sorry, something went wrong while processing your request."
         )
     
-    # Send error details to admin if configured
-    admin_chat_id = config.get("admin_chat_id")
-    if admin_chat_id:
-        error_text = f"Error processing update:\n{traceback.format_exc()}"
-        try:
-            await context.bot.send_message(admin_chat_id, error_text)
-        except Exception as e:
-            logger.error(f"Failed to send error message to admin: {e}")
+    # Queue error details for the admin (deduplicated and rate-limited)
+    if notifier is not None:
+        error_traceback = "".join(traceback.format_exception(type(error), error, error.__traceback__))
+        signature = hashlib.md5(error_traceback.encode()).digest()
+        
+        # Keep the end of the traceback, within Telegram's message size limit
+        error_text = f"Error processing update:\n{error_traceback[-3500:]}"
+        notifier.notify(signature, error_text)
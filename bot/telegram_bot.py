@@ -10,6 +10,7 @@ including message handling, command processing, and user interactions.
 """
 
 import logging
+import functools
 from telegram import Update, Bot
 from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes
 
@@ -53,35 +54,74 @@ async def setup_telegram_bot(config, context_manager, learning_engine, personali
         handle_error
     )
     
-    # Initialize handler functions with dependencies
+    # Serve repeated prompts from the response cache
+    # (Redis, when configured, shares entries across processes and restarts)
+    from llms.cached_client import CachedLLMClient, connect_redis
+    redis_client = connect_redis(config)
+    
+    # The semantic tier loads an embedding model, so it is only built when used
+    cache_config = config.get("cache", {})
+    semantic_cache = None
+    if cache_config.get("enabled", True) and cache_config.get("semantic", {}).get("enabled", True):
+        from core.semantic_cache import SemanticCache
+        semantic_cache = SemanticCache(config, redis_client=redis_client)
+    
+    if cache_config.get("enabled", True):
+        llm_client = CachedLLMClient(
+            llm_client,
+            config,
+            redis_client=redis_client,
+            semantic_cache=semantic_cache
+        )
+    
+    # Initialize handler functions with dependencies (bound once below with
+    # functools.partial rather than re-unpacked on every update)
     handler_dependencies = {
         "config": config,
         "context_manager": context_manager,
         "learning_engine": learning_engine,
         "personality_engine": personality_engine,
-        "llm_client": llm_client
+        "llm_client": llm_client,
+        "semantic_cache": semantic_cache,
+        # Parsed once so the /start check is an O(1) integer lookup
+        "allowed_user_ids": frozenset(int(user_id) for user_id in config["telegram"].get("allowed_users", []))
     }
     
+    # Queue updates per chat so slow requests never block other chats
+    from core.dispatcher import PerUserQueue
+    dispatcher = PerUserQueue(
+        max_concurrent=config["telegram"].get("max_concurrent_handlers", 32),
+        error_callback=application.process_error
+    )
+    
     # Register command handlers
     application.add_handler(CommandHandler("start", 
-                                           lambda update, context: start_command(update, context, **handler_dependencies)))
+                                           dispatcher.wrap(functools.partial(start_command, **handler_dependencies))))
     application.add_handler(CommandHandler("help", 
-                                           lambda update, context: help_command(update, context, **handler_dependencies)))
+                                           dispatcher.wrap(functools.partial(help_command, **handler_dependencies))))
     application.add_handler(CommandHandler("learn", 
-                                           lambda update, context: learn_command(update, context, **handler_dependencies)))
+                                           dispatcher.wrap(functools.partial(learn_command, **handler_dependencies))))
     application.add_handler(CommandHandler("recall", 
-                                           lambda update, context: recall_command(update, context, **handler_dependencies)))
+                                           dispatcher.wrap(functools.partial(recall_command, **handler_dependencies))))
     application.add_handler(CommandHandler("clear", 
-                                           lambda update, context: clear_command(update, context, **handler_dependencies)))
+                                           dispatcher.wrap(functools.partial(clear_command, **handler_dependencies))))
     
     # Register message handler
     application.add_handler(MessageHandler(
         filters.TEXT & ~filters.COMMAND, 
-        lambda update, context: handle_message(update, context, **handler_dependencies)
+        dispatcher.wrap(functools.partial(handle_message, **handler_dependencies))
     ))
     
     # Register error handler
-    application.add_error_handler(lambda update, context: handle_error(update, context, config))
+    # Admin error reports are sent from a background worker, not the error path
+    admin_notifier = None
+    admin_chat_id = config.get("admin_chat_id")
+    if admin_chat_id:
+        from bot.admin_notifier import AdminNotifier
+        admin_notifier = AdminNotifier(application.bot, admin_chat_id)
+        admin_notifier.start()
+    
+    application.add_error_handler(functools.partial(handle_error, config=config, notifier=admin_notifier))
     
     # Start the bot
     if config["telegram"].get("use_webhook", False) and config["telegram"].get("webhook_url"):
@@ -0,0 +1,156 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Telegram Bot Utilities for Olodymyr
+
+This module contains helpers shared by the bot's handlers.
+"""
+
+import logging
+import asyncio
+from telegram.error import BadRequest, TelegramError
+
+logger = logging.getLogger(__name__)
+
+# Telegram rejects messages longer than 4096 characters
+MAX_MESSAGE_LENGTH = 4000
+
+def iter_chunks(text, chunk=MAX_MESSAGE_LENGTH):
+    """
+    Yield slices of text no longer than chunk, preferring paragraph breaks.
+    
+    Args:
+        text: Text to split
+        chunk: Maximum chunk length
+        
+    Yields:
+        Text chunks, in order
+    """
+    start = 0
+    
+    while len(text) - start > chunk:
+        cut = _find_cut(text, start, chunk)
+        yield text[start:cut]
+        start = cut
+    
+    yield text[start:]
+
+def _find_cut(text, start, chunk):
+    """
+    Find where to end a chunk of text beginning at start.
+    
+    Args:
+        text: Text being split
+        start: Offset where the chunk begins
+        chunk: Maximum chunk length
+        
+    Returns:
+        Offset of the end of the chunk
+    """
+    end = start + chunk
+    
+    # Break on the nearest paragraph, line or word boundary in the second
+    # half of the window, so chunks never come out tiny
+    floor = start + chunk // 2
+    for separator in ("\n\n", "\n", " "):
+        cut = text.rfind(separator, floor, end)
+        if cut > floor:
+            return cut
+    
+    return end
+
+async def send_chunked(message, text, parse_mode=None, chunk=MAX_MESSAGE_LENGTH):
+    """
+    Reply to a message with text, split across several messages if needed.
+    
+    Args:
+        message: The Telegram message to reply to
+        text: Text to send
+        parse_mode: Optional Telegram parse mode
+        chunk: Maximum length of each message
+    """
+    for part in iter_chunks(text, chunk):
+        await message.reply_text(part, parse_mode=parse_mode)
+
+async def stream_reply(message, pieces, parse_mode=None, header="", chunk=MAX_MESSAGE_LENGTH,
+                       edit_every=40, edit_interval=0.5):
+    """
+    Reply to a message with streamed text, editing the reply as text arrives.
+    
+    At most one edit is in flight at a time; pieces arriving meanwhile are
+    coalesced into the next edit to stay within Telegram's rate limits.
+    
+    Args:
+        message: The Telegram message to reply to
+        pieces: Async iterator of text pieces
+        parse_mode: Optional Telegram parse mode for the final text
+        header: Text shown before the streamed content
+        chunk: Maximum length of each message
+        edit_every: Number of pieces after which the reply is edited
+        edit_interval: Seconds after which the reply is edited
+        
+    Returns:
+        The streamed text, without the header
+    """
+    loop = asyncio.get_running_loop()
+    sent = await message.reply_text("⏳")
+    
+    # Pieces are joined only when an edit goes out, and only for the
+    # message being streamed, which is at most one chunk long
+    parts = []
+    current = [header]
+    current_length = len(header)
+    pending = 0
+    last_edit = loop.time()
+    edit_task = None
+    
+    async for piece in pieces:
+        parts.append(piece)
+        current.append(piece)
+        current_length += len(piece)
+        pending += 1
+        
+        # Finish the current message and continue in a new one when it is full
+        if current_length > chunk:
+            if edit_task is not None:
+                await edit_task
+                edit_task = None
+            text = "".join(current)
+            while len(text) > chunk:
+                cut = _find_cut(text, 0, chunk)
+                await _edit_final(sent, text[:cut], parse_mode)
+                text = text[cut:]
+                sent = await message.reply_text("⏳")
+            current = [text]
+            current_length = len(text)
+        
+        if pending >= edit_every or loop.time() - last_edit >= edit_interval:
+            if edit_task is None or edit_task.done():
+                # Intermediate edits are plain text: partial Markdown may not parse
+                edit_task = asyncio.create_task(_edit_partial(sent, "".join(current)))
+                pending = 0
+                last_edit = loop.time()
+    
+    if edit_task is not None:
+        await edit_task
+    
+    await _edit_final(sent, "".join(current) or "…", parse_mode)
+    return "".join(parts)
+
+async def _edit_partial(message, text):
+    try:
+        await message.edit_text(text)
+    except TelegramError as e:
+        # e.g. "message is not modified"; the next edit catches up
+        logger.debug(f"Skipped streaming edit: {e}")
+
+async def _edit_final(message, text, parse_mode):
+    try:
+        await message.edit_text(text, parse_mode=parse_mode)
+    except BadRequest as e:
+        if "not modified" in str(e).lower():
+            return
+        # Fall back to plain text if the model produced invalid Markdown
+        logger.warning(f"Failed to format streamed reply: {e}")
+        await _edit_partial(message, text)
@@ -9,11 +9,57 @@ This module manages conversation context and working memory.
 """
 
 import logging
+import bisect
+import functools
+import itertools
 from typing import List, Dict, Any
 import asyncio
 
 logger = logging.getLogger(__name__)
 
+@functools.lru_cache(maxsize=None)
+def _load_encoding():
+    """
+    Load the shared tiktoken encoding, once.
+    
+    The encoding file is downloaded on first use, so this is deferred until
+    tokens are first counted and never stops the bot from starting.
+    
+    Returns:
+        tiktoken.Encoding, or None if it can't be loaded
+    """
+    try:
+        import tiktoken
+    except ImportError:
+        logger.warning("tiktoken not installed, using approximate token counts")
+        return None
+    
+    try:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        logger.warning(f"Failed to load tiktoken encoding, using approximate token counts: {e}")
+        return None
+
+@functools.lru_cache(maxsize=4096)
+def _count_tokens(text):
+    """
+    Count the tokens in a text, memoized by content.
+    
+    History is re-sent every turn, so most messages are counted repeatedly.
+    
+    Args:
+        text: Text to count tokens for
+        
+    Returns:
+        Token count
+    """
+    encoding = _load_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    
+    # Simple approximation: 1 token ≈ 4 characters
+    return len(text) // 4
+
 class ContextManager:
     """
     Manager for conversation context and working memory.
@@ -30,6 +76,7 @@ class ContextManager:
         self.config = config
         self.memory_api = memory_api
         self.short_term_limit = config["memory"].get("short_term_limit", 10)
+        self.working_memory_tokens = config["memory"].get("working_memory_tokens", 2000)
         
         logger.info(f"Context Manager initialized with short_term_limit: {self.short_term_limit}")
     
@@ -73,6 +120,24 @@ class ContextManager:
             logger.error(f"Error adding message to context for user {user_id}: {e}")
             return False
     
+    async def add_messages(self, user_id, messages):
+        """
+        Add several messages to the conversation context in one write.
+        
+        Args:
+            user_id: User ID
+            messages: List of {"role", "content"} dictionaries, in order
+            
+        Returns:
+            True if successful
+        """
+        try:
+            return await self.memory_api.add_messages_bulk(user_id, messages)
+            
+        except Exception as e:
+            logger.error(f"Error adding messages to context for user {user_id}: {e}")
+            return False
+    
     async def clear_context(self, user_id):
         """
         Clear conversation context for a user.
@@ -92,7 +157,7 @@ class ContextManager:
             logger.error(f"Error clearing context for user {user_id}: {e}")
             return False
     
-    async def get_token_count(self, text):
+    def get_token_count(self, text):
         """
         Get approximate token count for a text.
         
@@ -100,43 +165,37 @@ class ContextManager:
             text: Text to count tokens for
             
         Returns:
-            Approximate token count
+            Token count
         """
-        # Simple approximation: 1 token ≈ 4 characters
-        return len(text) // 4
+        return _count_tokens(text)
     
-    async def optimize_context(self, context, max_tokens):
+    def optimize_context(self, context, max_tokens=None):
         """
         Optimize context to fit within token limit.
         
+        Keeps the longest run of most recent messages whose combined token
+        count fits in max_tokens.
+        
         Args:
             context: List of conversation messages
-            max_tokens: Maximum tokens allowed
+            max_tokens: Maximum tokens allowed (default: working_memory_tokens)
             
         Returns:
             Optimized context
         """
         if not context:
             return []
-            
-        # Start with the most recent messages
-        optimized = []
-        current_tokens = 0
         
-        # Process messages from most recent to oldest
-        for message in reversed(context):
-            content = message.get("content", "")
-            role = message.get("role", "unknown")
-            
-            # Estimate tokens for this message
-            message_tokens = await self.get_token_count(f"{role}: {content}")
-            
-            # If adding this message would exceed limit, stop
-            if current_tokens + message_tokens > max_tokens:
-                break
-                
-            # Add message and update token count
-            optimized.insert(0, message)  # Insert at beginning to maintain chronological order
-            current_tokens += message_tokens
+        if max_tokens is None:
+            max_tokens = self.working_memory_tokens
+        
+        # Token count of each message as "role: content", newest first
+        tokens = [
+            self.get_token_count(f"{message.get('role', 'unknown')}: {message.get('content', '')}")
+            for message in reversed(context)
+        ]
+        
+        # Number of recent messages that fit within the budget
+        keep = bisect.bisect_right(list(itertools.accumulate(tokens)), max_tokens)
         
-        return optimized
+        return context[len(context) - keep:]
@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Update Dispatcher for Olodymyr AI Assistant
+
+This module runs Telegram handlers on per-chat FIFO queues, so a slow
+request in one chat never delays another chat while messages within a
+chat are still processed in order.
+"""
+
+import logging
+import asyncio
+
+logger = logging.getLogger(__name__)
+
+class PerUserQueue:
+    """
+    Per-chat FIFO dispatcher with a global concurrency limit.
+    """
+
+    def __init__(self, max_concurrent=32, error_callback=None):
+        """
+        Initialize the dispatcher.
+
+        Args:
+            max_concurrent: Maximum number of handlers running at once
+            error_callback: Optional coroutine function called with
+                (update, error) when a handler raises
+        """
+        self.max_concurrent = max_concurrent
+        self.error_callback = error_callback
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._queues = {}
+        self._workers = {}
+
+        logger.info(f"Dispatcher initialized with max_concurrent: {max_concurrent}")
+
+    def wrap(self, handler):
+        """
+        Wrap a handler so updates are queued instead of processed inline.
+
+        Args:
+            handler: Coroutine function taking (update, context)
+
+        Returns:
+            Coroutine function suitable for registering with the application
+        """
+        async def enqueue(update, context):
+            self.submit(update, context, handler)
+
+        return enqueue
+
+    def submit(self, update, context, handler):
+        """
+        Queue an update for its chat, starting the chat's worker if needed.
+
+        Args:
+            update: The incoming update
+            context: The handler context
+            handler: Coroutine function taking (update, context)
+        """
+        key = self._queue_key(update)
+
+        queue = self._queues.get(key)
+        if queue is None:
+            queue = asyncio.Queue()
+            self._queues[key] = queue
+            self._workers[key] = asyncio.create_task(self._worker(key, queue))
+
+        queue.put_nowait((update, context, handler))
+
+    def _queue_key(self, update):
+        if update.effective_chat is not None:
+            return update.effective_chat.id
+        if update.effective_user is not None:
+            return update.effective_user.id
+        return None
+
+    async def _worker(self, key, queue):
+        """
+        Process a chat's queue in order, exiting once it is drained.
+
+        Args:
+            key: Chat key
+            queue: The chat's update queue
+        """
+        while True:
+            try:
+                update, context, handler = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                # Nothing is awaited between the check and the removal, so no
+                # update can be queued for this chat in between
+                del self._queues[key]
+                del self._workers[key]
+                return
+
+            try:
+                async with self._semaphore:
+                    await handler(update, context)
+            except Exception as e:
+                logger.error(f"Error in queued handler for chat {key}: {e}")
+                if self.error_callback:
+                    try:
+                        await self.error_callback(update, e)
+                    except Exception as callback_error:
+                        logger.error(f"Error callback failed: {callback_error}")
@@ -153,6 +153,21 @@ class LearningEngine:
             logger.error(f"Error retrieving relevant memories: {e}")
             return []
     
+    async def synthesize(self, content):
+        """
+        Summarize content for later reuse.
+        
+        Args:
+            content: The content to summarize
+            
+        Returns:
+            The synthesized summary
+        """
+        from llms.prompts import LEARNING_SYNTHESIS_TEMPLATE
+        
+        prompt = LEARNING_SYNTHESIS_TEMPLATE.format(content=content)
+        return await self.llm_client.generate_completion(prompt)
+    
     async def generate_learning_response(self, content):
         """
         Generate a response confirming learning.
@@ -9,16 +9,22 @@ This module manages Olodymyr's personality, tone, and communication style.
 """
 
 import logging
+import functools
 from typing import Dict, List, Any
 from llms.prompts import (
     SYSTEM_PROMPT, 
-    CONVERSATION_PROMPT_TEMPLATE,
+    render_conversation,
     WELCOME_MESSAGE_TEMPLATE,
     HELP_MESSAGE
 )
 
 logger = logging.getLogger(__name__)
 
+@functools.lru_cache(maxsize=1024)
+def _render_welcome_message(user_name):
+    """Render the welcome message, memoized by user name."""
+    return WELCOME_MESSAGE_TEMPLATE.format(user_name=user_name)
+
 class PersonalityEngine:
     """
     Engine for managing Olodymyr's personality and communication style.
@@ -39,86 +45,198 @@ class PersonalityEngine:
         self.emoji_level = self.personality_config.get("emoji_level", "moderate")
         self.verbosity = self.personality_config.get("verbosity", "medium")
         
+        # The personality settings never change after this point, so the
+        # system prompt is rendered once here. It is the byte-stable prefix of
+        # every request and is reused verbatim.
+        prompt = SYSTEM_PROMPT
+        
+        # Customize based on personality settings
+        prompt += f"\n\nYou should speak in a {self.tone} tone, as a {self.persona}."
+        
+        # Adjust for emoji usage
+        if self.emoji_level == "none":
+            prompt += "\nDo not use any emojis in your responses."
+        elif self.emoji_level == "minimal":
+            prompt += "\nUse emojis very sparingly, only for key points."
+        elif self.emoji_level == "moderate":
+            prompt += "\nUse emojis moderately to emphasize key points and add warmth."
+        elif self.emoji_level == "high":
+            prompt += "\nUse emojis frequently to make your responses engaging and lively."
+        
+        # Adjust for verbosity
+        if self.verbosity == "concise":
+            prompt += "\nKeep your responses brief and to the point."
+        elif self.verbosity == "medium":
+            prompt += "\nProvide balanced explanations with enough detail to be helpful."
+        elif self.verbosity == "detailed":
+            prompt += "\nProvide comprehensive explanations with examples and context."
+        
+        self._system_prompt = prompt
+        
+        # Turns that leave the recent window are folded into a per-user summary
+        # that is only ever appended to, so it stays part of the cached prefix
+        memory_config = config.get("memory", {})
+        self.max_recent_turns = memory_config.get("max_recent_turns", 6)
+        self.committed_history_tokens = memory_config.get("committed_history_tokens", 1000)
+        self._committed_history = {}
+        self._committed_tokens = {}
+        self._committed_until = {}
+        self._history_epoch = {}
+        self._committing = set()
+        
         logger.info(f"Personality Engine initialized with persona: {self.persona}")
     
-    def build_prompt(self, conversation_history=None, relevant_memories=None, user_message=None):
+    def build_prompt(self, conversation_history=None, relevant_memories=None, user_message=None, user_id=None):
         """
-        Build a prompt for the LLM.
+        Build the chat messages for the LLM.
+        
+        Messages are ordered from most to least stable - system prompt,
+        committed summary of earlier turns, recent turns, then a final turn
+        with the relevant memories and the user message - so the prefix shared
+        between turns stays byte-identical and can be served from the
+        provider's prompt cache.
         
         Args:
             conversation_history: List of conversation messages
             relevant_memories: List of relevant memory items
             user_message: Optional user message to append
+            user_id: Optional user ID whose committed history is included
             
         Returns:
-            Formatted prompt string
+            List of chat messages
         """
-        # Start with system prompt
-        system_prompt = self._customize_system_prompt()
+        messages = [{"role": "system", "content": self._system_prompt}]
+        
+        # Earlier turns, summarized once and then frozen
+        committed = self._committed_history.get(user_id)
+        if committed:
+            messages.append({
+                "role": "system",
+                "content": f"Summary of the earlier conversation with the user:\n\n{committed}"
+            })
         
-        # Format conversation history
-        conversation_str = ""
+        # Recent turns, as sent in earlier requests
         if conversation_history:
-            for message in conversation_history:
-                role = message.get("role", "unknown")
-                content = message.get("content", "")
-                conversation_str += f"{role.capitalize()}: {content}\n\n"
+            for message in self._recent_turns(user_id, conversation_history):
+                messages.append({
+                    "role": message.get("role", "user"),
+                    "content": message.get("content", "")
+                })
         
-        # Format relevant memories
-        memories_str = ""
+        # Format relevant memories (joined once rather than grown with +=)
         if relevant_memories and len(relevant_memories) > 0:
-            memories_str = "Here are some relevant pieces of information from my memory:\n\n"
-            for i, memory in enumerate(relevant_memories):
-                memories_str += f"Memory {i+1} (from '{memory.get('session_name', 'unknown')}'):\n{memory.get('content', '')}\n\n"
+            memories_str = "Here are some relevant pieces of information from my memory:\n\n" + "".join(
+                f"Memory {i+1} (from '{memory.get('session_name', 'unknown')}'):\n{memory.get('content', '')}\n\n"
+                for i, memory in enumerate(relevant_memories)
+            )
         else:
             memories_str = "I don't have any specific memories relevant to this query."
         
         # Get user preferences (placeholder for now)
         user_preferences = "No specific preferences set."
         
-        # Build the full prompt using the template
-        prompt = CONVERSATION_PROMPT_TEMPLATE.format(
-            system_prompt=system_prompt,
-            user_preferences=user_preferences,
-            conversation_history=conversation_str,
-            relevant_memories=memories_str,
-            user_message=user_message if user_message else ""
-        )
+        # Memories change every turn, so they go last with the user message
+        messages.append({
+            "role": "user",
+            "content": render_conversation(
+                user_preferences=user_preferences,
+                relevant_memories=memories_str,
+                user_message=user_message if user_message else ""
+            )
+        })
         
-        return prompt
+        return messages
     
-    def _customize_system_prompt(self):
+    async def commit_history(self, user_id, conversation_history, learning_engine):
         """
-        Customize the system prompt based on personality settings.
+        Fold the oldest recent turns into the user's committed summary once
+        more than max_recent_turns are pending.
         
-        Returns:
-            Customized system prompt
+        Args:
+            user_id: User ID
+            conversation_history: List of conversation messages, oldest first
+            learning_engine: LearningEngine used to synthesize the summary
         """
-        # Start with the base system prompt
-        prompt = SYSTEM_PROMPT
+        recent = self._recent_turns(user_id, conversation_history or [])
+        if len(recent) <= self.max_recent_turns or user_id in self._committing:
+            return
         
-        # Customize based on personality settings
-        prompt += f"\n\nYou should speak in a {self.tone} tone, as a {self.persona}."
+        # Commit in batches so the summary changes every few turns, not every turn
+        older = recent[:len(recent) - self.max_recent_turns // 2]
+        until = older[-1].get("timestamp")
+        if until is None:
+            return
         
-        # Adjust for emoji usage
-        if self.emoji_level == "none":
-            prompt += "\nDo not use any emojis in your responses."
-        elif self.emoji_level == "minimal":
-            prompt += "\nUse emojis very sparingly, only for key points."
-        elif self.emoji_level == "moderate":
-            prompt += "\nUse emojis moderately to emphasize key points and add warmth."
-        elif self.emoji_level == "high":
-            prompt += "\nUse emojis frequently to make your responses engaging and lively."
+        epoch = self._history_epoch.get(user_id, 0)
+        self._committing.add(user_id)
         
-        # Adjust for verbosity
-        if self.verbosity == "concise":
-            prompt += "\nKeep your responses brief and to the point."
-        elif self.verbosity == "medium":
-            prompt += "\nProvide balanced explanations with enough detail to be helpful."
-        elif self.verbosity == "detailed":
-            prompt += "\nProvide comprehensive explanations with examples and context."
+        try:
+            transcript = "\n\n".join(
+                f"{m.get('role', 'unknown').capitalize()}: {m.get('content', '')}" for m in older
+            )
+            summary = await learning_engine.synthesize(transcript)
+            
+            committed = self._committed_history.get(user_id, "")
+            tokens = self._committed_tokens.get(user_id, 0) + len(summary) // 4
+            
+            if committed and tokens > self.committed_history_tokens:
+                # Over budget: collapse everything into one summary (the
+                # cached prefix is rebuilt once)
+                committed = await learning_engine.synthesize(f"{committed}\n\n{summary}")
+                tokens = len(committed) // 4
+            else:
+                committed = f"{committed}\n\n{summary}" if committed else summary
+            
+            # The history was cleared while summarizing
+            if self._history_epoch.get(user_id, 0) != epoch:
+                return
+            
+            self._committed_history[user_id] = committed
+            self._committed_tokens[user_id] = tokens
+            self._committed_until[user_id] = until
+            
+        except Exception as e:
+            logger.error(f"Error committing conversation history for user {user_id}: {e}")
+            
+        finally:
+            self._committing.discard(user_id)
+    
+    def forget_history(self, user_id):
+        """
+        Drop the committed summary of a user's conversation.
+        
+        Args:
+            user_id: User ID
+        """
+        self._committed_history.pop(user_id, None)
+        self._committed_tokens.pop(user_id, None)
+        self._committed_until.pop(user_id, None)
+        self._history_epoch[user_id] = self._history_epoch.get(user_id, 0) + 1
+    
+    def _recent_turns(self, user_id, conversation_history):
+        """
+        Get the turns not yet folded into the committed summary.
+        
+        Args:
+            user_id: User ID
+            conversation_history: List of conversation messages, oldest first
+            
+        Returns:
+            List of conversation messages
+        """
+        until = self._committed_until.get(user_id)
+        if until is None:
+            return conversation_history
+        return [m for m in conversation_history if (m.get("timestamp") or "") > until]
+    
+    def _customize_system_prompt(self):
+        """
+        Get the system prompt customized for the personality settings.
         
-        return prompt
+        Returns:
+            Customized system prompt, rendered once in __init__
+        """
+        return self._system_prompt
     
     def get_welcome_message(self, user_name="there"):
         """
@@ -130,7 +248,7 @@ class PersonalityEngine:
         Returns:
             Welcome message string
         """
-        return WELCOME_MESSAGE_TEMPLATE.format(user_name=user_name)
+        return _render_welcome_message(user_name)
     
     def get_help_message(self):
         """
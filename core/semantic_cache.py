@@ -0,0 +1,371 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Semantic Cache for Olodymyr AI Assistant
+
+This module reuses previous responses for reworded user messages by comparing
+message embeddings, so near-duplicate questions don't reach the LLM again.
+"""
+
+import logging
+import asyncio
+import threading
+import time
+import uuid
+from cachetools import LRUCache
+
+logger = logging.getLogger(__name__)
+
+def _quantize_int8(vector, np):
+    """
+    Scalar-quantize a vector to int8 with a single float32 scale.
+
+    Args:
+        vector: float32 vector of shape (dim,)
+        np: The numpy module
+
+    Returns:
+        Tuple of (int8 codes, scale) with vector ~= codes * scale
+    """
+    scale = float(np.abs(vector).max()) / 127.0 or 1.0
+    return np.round(vector / scale).astype(np.int8), scale
+
+class QuantizedBackend:
+    """
+    In-process per-user vector store with int8 scalar-quantized vectors.
+
+    Each vector is kept as int8 codes plus one float32 scale, a quarter of the
+    memory (and of the bandwidth scanned per lookup) of float32 vectors.
+    """
+
+    def __init__(self, max_entries_per_user, max_stores, ttl_seconds):
+        """
+        Initialize the backend.
+
+        Args:
+            max_entries_per_user: Maximum cached responses kept per user
+            max_stores: Maximum number of users (or scopes) kept; the least
+                recently used store is dropped beyond that
+            ttl_seconds: Time-to-live of each entry
+        """
+        import numpy as np
+        from memory._kernels import int8_dot_scores
+        self._np = np
+        self._dot_scores = int8_dot_scores
+
+        self.max_entries_per_user = max_entries_per_user
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._stores = LRUCache(maxsize=max_stores)
+
+    def has_entries(self, user_id):
+        return user_id in self._stores
+
+    async def search(self, user_id, embedding):
+        """
+        Find the closest cached entry for a user.
+
+        Args:
+            user_id: User ID
+            embedding: Normalized float32 query vector of shape (1, dim)
+
+        Returns:
+            Tuple of (cosine similarity, response), or None if the user has no entries
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self._search_sync, user_id, embedding)
+
+    def _search_sync(self, user_id, embedding):
+        np = self._np
+
+        with self._lock:
+            store = self._stores.get(user_id)
+            if store is None or store["size"] == 0:
+                return None
+
+            size = store["size"]
+            codes, scale = _quantize_int8(embedding[0], np)
+
+            # Integer dot products, rescaled to (approximate) cosine similarity
+            dots = self._dot_scores(codes, store["codes"][:size])
+            scores = dots * store["scales"][:size] * scale
+
+            # Expired entries never match
+            expired = store["times"][:size] < time.monotonic() - self.ttl_seconds
+            if expired.all():
+                return None
+            scores[expired] = -np.inf
+
+            best = int(np.argmax(scores))
+            return float(scores[best]), store["responses"][best]
+
+    async def clear(self, user_id):
+        """
+        Drop every entry of a user.
+
+        Args:
+            user_id: User ID
+        """
+        with self._lock:
+            self._stores.pop(user_id, None)
+
+    async def add(self, user_id, embedding, response):
+        """
+        Store a response under its message embedding.
+
+        Args:
+            user_id: User ID
+            embedding: Normalized float32 vector of shape (1, dim)
+            response: The generated response
+        """
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._add_sync, user_id, embedding, response)
+
+    def _add_sync(self, user_id, embedding, response):
+        np = self._np
+        codes, scale = _quantize_int8(embedding[0], np)
+
+        with self._lock:
+            store = self._stores.get(user_id)
+            if store is None:
+                store = {
+                    "codes": np.zeros((self.max_entries_per_user, codes.shape[0]), dtype=np.int8),
+                    "scales": np.zeros(self.max_entries_per_user, dtype=np.float32),
+                    "times": np.zeros(self.max_entries_per_user, dtype=np.float64),
+                    "responses": [None] * self.max_entries_per_user,
+                    "size": 0,
+                    "next": 0
+                }
+                self._stores[user_id] = store
+
+            # Ring buffer: once full, the oldest entry is overwritten
+            slot = store["next"]
+            store["codes"][slot] = codes
+            store["scales"][slot] = scale
+            store["times"][slot] = time.monotonic()
+            store["responses"][slot] = response
+            store["next"] = (slot + 1) % self.max_entries_per_user
+            store["size"] = min(store["size"] + 1, self.max_entries_per_user)
+
+class RedisVectorBackend:
+    """
+    Redis vector store (RediSearch HNSW index), shared across bot processes.
+    """
+
+    KEY_PREFIX = "llm:sem:"
+    INDEX_NAME = "llm_sem_idx"
+
+    def __init__(self, redis_client, ttl_seconds):
+        """
+        Initialize the backend.
+
+        Args:
+            redis_client: redis.asyncio.Redis instance
+            ttl_seconds: Time-to-live of each entry
+        """
+        self.redis = redis_client
+        self.ttl_seconds = ttl_seconds
+        self._index_ready = False
+
+    def has_entries(self, user_id):
+        # Entries may have been written by another process
+        return True
+
+    async def _ensure_index(self, dim):
+        if self._index_ready:
+            return
+
+        from redis.commands.search.field import TagField, VectorField
+        from redis.commands.search.indexDefinition import IndexDefinition, IndexType
+
+        try:
+            await self.redis.ft(self.INDEX_NAME).create_index(
+                [
+                    TagField("user_id"),
+                    VectorField("embedding", "HNSW", {
+                        "TYPE": "FLOAT32",
+                        "DIM": dim,
+                        "DISTANCE_METRIC": "COSINE"
+                    })
+                ],
+                definition=IndexDefinition(prefix=[self.KEY_PREFIX], index_type=IndexType.HASH)
+            )
+        except Exception as e:
+            if "Index already exists" not in str(e):
+                raise
+
+        self._index_ready = True
+
+    async def search(self, user_id, embedding):
+        from redis.commands.search.query import Query
+
+        await self._ensure_index(embedding.shape[1])
+
+        query = (
+            Query(f"(@user_id:{{{_escape_tag(user_id)}}})=>[KNN 1 @embedding $vec AS distance]")
+            .return_fields("response", "distance")
+            .dialect(2)
+        )
+        results = await self.redis.ft(self.INDEX_NAME).search(
+            query, query_params={"vec": embedding[0].tobytes()}
+        )
+
+        if not results.docs:
+            return None
+
+        doc = results.docs[0]
+        response = doc.response.decode() if isinstance(doc.response, bytes) else doc.response
+
+        # COSINE distance is 1 - cosine similarity
+        return 1.0 - float(doc.distance), response
+
+    async def add(self, user_id, embedding, response):
+        await self._ensure_index(embedding.shape[1])
+
+        key = f"{self.KEY_PREFIX}{user_id}:{uuid.uuid4().hex}"
+
+        pipe = self.redis.pipeline()
+        pipe.hset(key, mapping={
+            "user_id": str(user_id),
+            "response": response,
+            "embedding": embedding[0].tobytes()
+        })
+        pipe.expire(key, self.ttl_seconds)
+        await pipe.execute()
+
+    async def clear(self, user_id):
+        """
+        Drop every entry of a user.
+
+        Args:
+            user_id: User ID
+        """
+        keys = [key async for key in self.redis.scan_iter(match=f"{self.KEY_PREFIX}{user_id}:*")]
+        if keys:
+            await self.redis.delete(*keys)
+
+def _escape_tag(value):
+    """Escape a value for use inside a RediSearch tag query."""
+    return "".join(c if c.isalnum() else f"\\{c}" for c in str(value))
+
+class SemanticCache:
+    """
+    Per-user semantic response cache.
+    """
+
+    def __init__(self, config, redis_client=None):
+        """
+        Initialize the Semantic Cache.
+
+        Args:
+            config: Configuration dictionary
+            redis_client: Optional Redis client; entries are kept in-process without it
+        """
+        cache_config = config.get("cache", {})
+        semantic_config = cache_config.get("semantic", {})
+        self.enabled = semantic_config.get("enabled", True)
+        self.model_name = semantic_config.get("model", "all-MiniLM-L6-v2")
+        self.threshold = semantic_config.get("threshold", 0.92)
+        self.max_entries_per_user = semantic_config.get("max_entries_per_user", 256)
+        self.max_stores = semantic_config.get("max_stores", 256)
+
+        self._model = None
+        self._model_lock = threading.Lock()
+        self.backend = None
+
+        if self.enabled:
+            try:
+                import numpy as np
+                from sentence_transformers import SentenceTransformer
+                self._np = np
+                self._model_class = SentenceTransformer
+
+                if redis_client is not None:
+                    self.backend = RedisVectorBackend(redis_client, cache_config.get("ttl_seconds", 3600))
+                    logger.info("Using Redis for semantic cache")
+                else:
+                    self.backend = QuantizedBackend(
+                        self.max_entries_per_user,
+                        self.max_stores,
+                        cache_config.get("ttl_seconds", 3600)
+                    )
+            except ImportError:
+                logger.warning("numpy or sentence-transformers not installed, semantic cache disabled")
+                self.enabled = False
+
+        logger.info(f"Semantic cache initialized (enabled: {self.enabled}, threshold: {self.threshold})")
+
+    async def lookup(self, user_id, message, threshold=None):
+        """
+        Find a cached response for a semantically similar message.
+
+        Args:
+            user_id: User ID (entries are never shared between users)
+            message: The user's message
+            threshold: Minimum cosine similarity for a hit (default: from config)
+
+        Returns:
+            The cached response, or None on a miss
+        """
+        if not self.enabled or not self.backend.has_entries(user_id):
+            return None
+
+        threshold = self.threshold if threshold is None else threshold
+
+        try:
+            embedding = await self._embed(message)
+            match = await self.backend.search(user_id, embedding)
+            if match is not None and match[0] >= threshold:
+                return match[1]
+            return None
+        except Exception as e:
+            logger.error(f"Error looking up semantic cache: {e}")
+            return None
+
+    async def insert(self, user_id, message, response):
+        """
+        Store a response for a user message.
+
+        Args:
+            user_id: User ID
+            message: The user's message
+            response: The generated response
+        """
+        if not self.enabled:
+            return
+
+        try:
+            embedding = await self._embed(message)
+            await self.backend.add(user_id, embedding, response)
+        except Exception as e:
+            logger.error(f"Error inserting into semantic cache: {e}")
+
+    async def invalidate(self, user_id):
+        """
+        Drop a user's cached responses, e.g. after their context changed.
+
+        Args:
+            user_id: User ID
+        """
+        if not self.enabled:
+            return
+
+        try:
+            await self.backend.clear(user_id)
+        except Exception as e:
+            logger.error(f"Error invalidating semantic cache: {e}")
+
+    async def _embed(self, text):
+        # Model inference is CPU-bound, keep it off the event loop
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self._embed_sync, text)
+
+    def _embed_sync(self, text):
+        with self._model_lock:
+            if self._model is None:
+                self._model = self._model_class(self.model_name)
+
+        # Normalized embeddings make inner product equal to cosine similarity
+        embedding = self._model.encode([text], normalize_embeddings=True)
+        return self._np.asarray(embedding, dtype="float32")
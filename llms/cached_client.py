@@ -0,0 +1,366 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Cached LLM Client for Olodymyr
+
+This module wraps the LLM client with an exact-match response cache, backed
+by an optional semantic tier for low-temperature requests, so that repeated
+prompts are answered without another round-trip to the API.
+"""
+
+import logging
+import asyncio
+import json
+import hashlib
+from cachetools import TTLCache
+
+logger = logging.getLogger(__name__)
+
+def connect_redis(config):
+    """
+    Create the shared Redis client for the caches, if configured.
+
+    Args:
+        config: Configuration dictionary
+
+    Returns:
+        redis.asyncio.Redis instance, or None if Redis isn't configured or installed
+    """
+    redis_url = config.get("cache", {}).get("redis_url")
+    if not redis_url:
+        return None
+
+    try:
+        import redis.asyncio as redis
+    except ImportError:
+        logger.warning("redis library not installed, using in-process caches")
+        return None
+
+    return redis.from_url(redis_url)
+
+class InMemoryBackend:
+    """
+    In-process TTL cache backend.
+    """
+
+    def __init__(self, max_entries, ttl_seconds):
+        """
+        Initialize the backend.
+
+        Args:
+            max_entries: Maximum number of cached responses
+            ttl_seconds: Time-to-live of each entry
+        """
+        self._cache = TTLCache(maxsize=max_entries, ttl=ttl_seconds)
+        self._lock = asyncio.Lock()
+
+    async def get(self, key):
+        async with self._lock:
+            return self._cache.get(key)
+
+    async def set(self, key, value):
+        async with self._lock:
+            self._cache[key] = value
+
+class RedisBackend:
+    """
+    Redis cache backend, shared across bot processes and restarts.
+    """
+
+    KEY_PREFIX = "llm:exact:"
+
+    def __init__(self, redis_client, ttl_seconds):
+        """
+        Initialize the backend.
+
+        Args:
+            redis_client: redis.asyncio.Redis instance
+            ttl_seconds: Time-to-live of each entry
+        """
+        self.redis = redis_client
+        self.ttl_seconds = ttl_seconds
+
+    async def get(self, key):
+        value = await self.redis.get(self.KEY_PREFIX + key)
+        return value.decode() if value is not None else None
+
+    async def set(self, key, value):
+        await self.redis.set(self.KEY_PREFIX + key, value, ex=self.ttl_seconds)
+
+class CachedLLMClient:
+    """
+    Exact-match response cache in front of an LLM client.
+    """
+
+    def __init__(self, llm_client, config, redis_client=None, semantic_cache=None):
+        """
+        Initialize the cached client.
+
+        Args:
+            llm_client: The LLM client to wrap
+            config: Configuration dictionary
+            redis_client: Optional Redis client; entries are kept in-process without it
+            semantic_cache: Optional SemanticCache used as a second, similarity-based tier
+        """
+        self.llm_client = llm_client
+        self.semantic_cache = semantic_cache
+
+        cache_config = config.get("cache", {})
+        self.ttl_seconds = cache_config.get("ttl_seconds", 3600)
+        self.max_entries = cache_config.get("max_entries", 1024)
+
+        # Sampling at high temperature is meant to vary, so those responses
+        # aren't pinned; the semantic tier is stricter still
+        semantic_config = cache_config.get("semantic", {})
+        self.max_temperature = cache_config.get("max_temperature", 0.7)
+        self.semantic_max_temperature = semantic_config.get("max_temperature", 0.3)
+        self.semantic_threshold = semantic_config.get("prompt_threshold", 0.95)
+
+        if redis_client is not None:
+            self.backend = RedisBackend(redis_client, self.ttl_seconds)
+            logger.info("Using Redis for LLM response cache")
+        else:
+            self.backend = InMemoryBackend(self.max_entries, self.ttl_seconds)
+
+        self._inflight = {}
+        self._inflight_lock = asyncio.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+        logger.info("LLM response cache initialized with ttl: %ss", self.ttl_seconds)
+
+    def __getattr__(self, name):
+        # Delegate everything that isn't cached (embeddings, model names, ...)
+        return getattr(self.llm_client, name)
+
+    def cache_key(self, prompt=None, model=None, temperature=0.7, system=None, messages=None):
+        """
+        Compute the cache key for a completion request.
+
+        Args:
+            prompt: The prompt to send to the API
+            model: The model to use (defaults to the client's default model)
+            temperature: The creativity temperature
+            system: Optional system prompt
+            messages: Complete chat messages, used instead of prompt/system
+
+        Returns:
+            Hex digest identifying the request
+        """
+        model = model or self.llm_client.default_model
+        if messages is not None:
+            prompt = json.dumps(messages, ensure_ascii=False, sort_keys=True)
+        elif system:
+            prompt = f"{system}|{prompt}"
+        return hashlib.sha256(f"{model}|{temperature}|{prompt}".encode()).hexdigest()
+
+    async def generate_completion(self, prompt=None, model=None, temperature=0.7, system=None, cache_prefix=False, messages=None):
+        """
+        Generate a completion, serving identical requests from the cache.
+
+        Args:
+            prompt: The prompt to send to the API
+            model: The model to use (defaults to the configured default model)
+            temperature: The creativity temperature (0.0 - 1.0)
+            system: Optional static system prompt sent ahead of the prompt
+            cache_prefix: Ask the provider to cache the system prompt
+            messages: Complete chat messages to send instead of prompt/system
+
+        Returns:
+            The generated text
+        """
+        if temperature > self.max_temperature:
+            return await self.llm_client.generate_completion(
+                prompt,
+                model=model,
+                temperature=temperature,
+                system=system,
+                cache_prefix=cache_prefix,
+                messages=messages
+            )
+
+        key = self.cache_key(prompt, model, temperature, system, messages)
+
+        cached = await self._lookup(key, model, temperature, prompt, system, messages)
+        if cached is not None:
+            return cached
+
+        # Identical requests already in flight share a single API call
+        async with self._inflight_lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = asyncio.get_running_loop().create_future()
+                self._inflight[key] = future
+
+        if not owner:
+            self.hits += 1
+            logger.debug("LLM request joined in-flight call (%d hits / %d misses)", self.hits, self.misses)
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                # The call's owner was cancelled, not this request; retry
+                return await self.generate_completion(
+                    prompt,
+                    model=model,
+                    temperature=temperature,
+                    system=system,
+                    cache_prefix=cache_prefix,
+                    messages=messages
+                )
+
+        self.misses += 1
+        logger.debug("LLM cache miss (%d hits / %d misses)", self.hits, self.misses)
+
+        try:
+            response = await self.llm_client.generate_completion(
+                prompt,
+                model=model,
+                temperature=temperature,
+                system=system,
+                cache_prefix=cache_prefix,
+                messages=messages
+            )
+            await self._store(key, response, model, temperature, prompt, system, messages)
+            future.set_result(response)
+            return response
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved in case nobody else was waiting
+            future.exception()
+            raise
+        except BaseException:
+            # Cancellation (or shutdown) of the owner isn't a failure of the
+            # call; cancelled futures make joined requests retry
+            future.cancel()
+            raise
+        finally:
+            async with self._inflight_lock:
+                self._inflight.pop(key, None)
+
+    async def generate_completion_stream(self, prompt=None, model=None, temperature=0.7, system=None, cache_prefix=False, messages=None):
+        """
+        Stream a completion, replaying cached responses in a single piece.
+
+        Args:
+            prompt: The prompt to send to the API
+            model: The model to use (defaults to the configured default model)
+            temperature: The creativity temperature (0.0 - 1.0)
+            system: Optional static system prompt sent ahead of the prompt
+            cache_prefix: Ask the provider to cache the system prompt
+            messages: Complete chat messages to send instead of prompt/system
+
+        Yields:
+            Pieces of the generated text
+        """
+        if temperature > self.max_temperature:
+            async for piece in self.llm_client.generate_completion_stream(
+                prompt,
+                model=model,
+                temperature=temperature,
+                system=system,
+                cache_prefix=cache_prefix,
+                messages=messages
+            ):
+                yield piece
+            return
+
+        key = self.cache_key(prompt, model, temperature, system, messages)
+
+        cached = await self._lookup(key, model, temperature, prompt, system, messages)
+        if cached is not None:
+            yield cached
+            return
+
+        self.misses += 1
+        logger.debug("LLM cache miss (%d hits / %d misses)", self.hits, self.misses)
+
+        parts = []
+        async for piece in self.llm_client.generate_completion_stream(
+            prompt,
+            model=model,
+            temperature=temperature,
+            system=system,
+            cache_prefix=cache_prefix,
+            messages=messages
+        ):
+            parts.append(piece)
+            yield piece
+
+        await self._store(key, "".join(parts).strip(), model, temperature, prompt, system, messages)
+
+    async def _lookup(self, key, model, temperature, prompt, system, messages):
+        """
+        Look a request up in the exact tier, then in the semantic tier.
+
+        Returns:
+            The cached response, or None on a miss
+        """
+        cached = await self._get(key)
+
+        if cached is None and self._semantic_enabled(temperature, messages):
+            scope, text = self._semantic_scope(model, prompt, system, messages)
+            cached = await self.semantic_cache.lookup(scope, text, threshold=self.semantic_threshold)
+
+        if cached is not None:
+            self.hits += 1
+            logger.debug("LLM cache hit (%d hits / %d misses)", self.hits, self.misses)
+
+        return cached
+
+    async def _store(self, key, response, model, temperature, prompt, system, messages):
+        """Write a fresh response to every applicable tier."""
+        await self._set(key, response)
+
+        if self._semantic_enabled(temperature, messages):
+            scope, text = self._semantic_scope(model, prompt, system, messages)
+            await self.semantic_cache.insert(scope, text, response)
+
+    def _semantic_enabled(self, temperature, messages):
+        # A reply to a follow-up depends on the turns before it, so only
+        # single-turn requests are matched by similarity
+        return (
+            self.semantic_cache is not None
+            and self.semantic_cache.enabled
+            and temperature <= self.semantic_max_temperature
+            and (messages is None or all(m["role"] == "system" for m in messages[:-1]))
+        )
+
+    def _semantic_scope(self, model, prompt, system, messages):
+        """
+        Split a request into the part that must match exactly and the part
+        compared by similarity.
+
+        Only the final message is embedded; the model and the system prompt
+        form the scope, so responses are never reused across different
+        system prompts.
+
+        Returns:
+            Tuple of (scope, text to embed)
+        """
+        model = model or self.llm_client.default_model
+        if messages is not None:
+            prefix, text = messages[:-1], messages[-1]["content"]
+        else:
+            prefix, text = system, prompt
+
+        prefix = json.dumps(prefix, ensure_ascii=False, sort_keys=True)
+        scope = hashlib.sha256(f"{model}|{prefix}".encode()).hexdigest()[:32]
+        return f"llm:{scope}", text
+
+    async def _get(self, key):
+        try:
+            return await self.backend.get(key)
+        except Exception as e:
+            logger.error("Error reading LLM response cache: %s", e)
+            return None
+
+    async def _set(self, key, value):
+        try:
+            await self.backend.set(key, value)
+        except Exception as e:
+            logger.error("Error writing LLM response cache: %s", e)
@@ -11,11 +11,77 @@ language models like Claude Haiku and Mistral.
 
 import logging
 import json
-import requests
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
+import hashlib
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+import httpx
+from tenacity import retry, stop_after_attempt, wait_random_exponential, retry_if_exception_type
 
 logger = logging.getLogger(__name__)
 
+# orjson decodes large responses (embedding batches) several times faster
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    logger.warning("orjson not installed, using the standard json module")
+    _json_loads = json.loads
+
+class RateLimitError(Exception):
+    """
+    Raised when the API answers 429 (rate limited) or 503 (overloaded).
+    """
+    
+    def __init__(self, response):
+        """
+        Initialize the error.
+        
+        Args:
+            response: The rejected httpx response
+        """
+        super().__init__(f"OpenRouter rate limited the request (HTTP {response.status_code})")
+        self.response = response
+        self.retry_after = _parse_retry_after(response.headers.get("Retry-After"))
+
+def _parse_retry_after(value):
+    """
+    Parse a Retry-After header.
+    
+    Args:
+        value: Header value, in seconds or as an HTTP date
+        
+    Returns:
+        Delay in seconds, or None if missing or unparseable
+    """
+    if not value:
+        return None
+    
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    
+    try:
+        retry_at = parsedate_to_datetime(value)
+        return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+_backoff = wait_random_exponential(multiplier=1, max=10)
+
+def _wait_retry_after(retry_state):
+    """
+    Wait as long as the server asked (capped at 30s), or back off exponentially.
+    """
+    delay = _backoff(retry_state)
+    error = retry_state.outcome.exception()
+    
+    if isinstance(error, RateLimitError) and error.retry_after is not None:
+        # Jitter on top of the server's delay spreads out retrying clients
+        delay = min(error.retry_after, 30.0) + delay / 10
+    
+    return delay
+
 class OpenRouterClient:
     """
     Client for communicating with OpenRouter API.
@@ -42,18 +108,25 @@ class OpenRouterClient:
         self.headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json",
+            # JSON bodies (embedding batches especially) compress well;
+            # brotli decoding needs the httpx[brotli] extra
+            "Accept-Encoding": "gzip, br",
             "HTTP-Referer": "https://olodymyr-ai.replit.app",  # Replace with your actual domain
             "X-Title": "Olodymyr AI Assistant"
         }
         
+        # One pooled client for all requests, so concurrent calls share
+        # connections (multiplexed over HTTP/2) instead of each blocking the loop
+        self._client = httpx.AsyncClient(
+            http2=True,
+            timeout=30,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+            headers=self.headers
+        )
+        
         logger.info(f"Initialized OpenRouter client with default model: {self.default_model}")
     
-    @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=2, max=10),
-        retry=retry_if_exception_type((requests.exceptions.Timeout, requests.exceptions.ConnectionError))
-    )
-    async def generate_completion(self, prompt, model=None, temperature=0.7):
+    async def generate_completion(self, prompt=None, model=None, temperature=0.7, system=None, cache_prefix=False, messages=None):
         """
         Generate a completion from the OpenRouter API.
         
@@ -61,27 +134,18 @@ class OpenRouterClient:
             prompt: The prompt to send to the API
             model: The model to use (defaults to the configured default model)
             temperature: The creativity temperature (0.0 - 1.0)
+            system: Optional static system prompt sent ahead of the prompt
+            cache_prefix: Ask the provider to cache the system prompt
+            messages: Complete chat messages to send instead of prompt/system
             
         Returns:
             The generated text
         """
         model = model or self.default_model
+        payload = self._build_payload(prompt, model, temperature, system, cache_prefix, messages)
         
         try:
-            response = requests.post(
-                f"{self.base_url}/chat/completions",
-                headers=self.headers,
-                json={
-                    "model": model,
-                    "messages": [{"role": "user", "content": prompt}],
-                    "temperature": temperature,
-                    "max_tokens": self.max_tokens
-                },
-                timeout=30
-            )
-            
-            response.raise_for_status()
-            response_json = response.json()
+            response_json = await self._post_completion(payload)
             
             # Extract the generated text
             if "choices" in response_json and len(response_json["choices"]) > 0:
@@ -90,18 +154,243 @@ class OpenRouterClient:
                 logger.error(f"Unexpected API response: {response_json}")
                 return "I'm sorry, I couldn't generate a response. Please try again."
                 
-        except requests.exceptions.HTTPError as e:
-            if response.status_code == 429:
-                logger.warning("Rate limit exceeded, using fallback model")
-                return await self.generate_completion(prompt, model=self.fallback_model, temperature=temperature)
-            else:
-                logger.error(f"HTTP error: {e.response.text if hasattr(e, 'response') else e}")
+        except RateLimitError:
+            # Only switch models once waiting out the rate limit has failed
+            if model == self.fallback_model:
                 raise
+            
+            logger.warning("Rate limit persisted after retries, using fallback model")
+            return await self.generate_completion(
+                prompt,
+                model=self.fallback_model,
+                temperature=temperature,
+                system=system,
+                cache_prefix=cache_prefix,
+                messages=messages
+            )
+                
+        except httpx.HTTPStatusError as e:
+            logger.error(f"HTTP error: {e.response.text}")
+            raise
                 
         except Exception as e:
             logger.error(f"Error generating completion: {str(e)}")
             raise
     
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=_wait_retry_after,
+        retry=retry_if_exception_type((httpx.TimeoutException, httpx.ConnectError, RateLimitError)),
+        reraise=True
+    )
+    async def _post_completion(self, payload):
+        """
+        Send a chat completion request, retrying transient failures.
+        
+        Args:
+            payload: Request payload dictionary
+            
+        Returns:
+            The decoded response body
+        """
+        response = await self._client.post(
+            f"{self.base_url}/chat/completions",
+            json=payload
+        )
+        
+        if response.status_code in (429, 503):
+            raise RateLimitError(response)
+        
+        response.raise_for_status()
+        return _json_loads(response.content)
+    
+    async def generate_completion_stream(self, prompt=None, model=None, temperature=0.7, system=None, cache_prefix=False, messages=None):
+        """
+        Generate a completion from the OpenRouter API, yielding text as it arrives.
+        
+        Args:
+            prompt: The prompt to send to the API
+            model: The model to use (defaults to the configured default model)
+            temperature: The creativity temperature (0.0 - 1.0)
+            system: Optional static system prompt sent ahead of the prompt
+            cache_prefix: Ask the provider to cache the system prompt
+            messages: Complete chat messages to send instead of prompt/system
+            
+        Yields:
+            Pieces of the generated text
+        """
+        model = model or self.default_model
+        payload = self._build_payload(prompt, model, temperature, system, cache_prefix, messages)
+        payload["stream"] = True
+        
+        try:
+            response = await self._open_stream(payload)
+            
+        except RateLimitError:
+            # Nothing has been yielded yet, so the whole stream can move over
+            if model == self.fallback_model:
+                raise
+            
+            logger.warning("Rate limit persisted after retries, using fallback model")
+            async for piece in self.generate_completion_stream(
+                prompt,
+                model=self.fallback_model,
+                temperature=temperature,
+                system=system,
+                cache_prefix=cache_prefix,
+                messages=messages
+            ):
+                yield piece
+            return
+            
+        except Exception as e:
+            logger.error(f"Error streaming completion: {str(e)}")
+            raise
+        
+        try:
+            async for line in response.aiter_lines():
+                # Skip keep-alive comments and blank separators
+                if not line or not line.startswith("data: "):
+                    continue
+                
+                data = line[len("data: "):]
+                if data == "[DONE]":
+                    break
+                
+                choices = _json_loads(data).get("choices") or [{}]
+                delta = choices[0].get("delta", {}).get("content")
+                if delta:
+                    yield delta
+                    
+        except Exception as e:
+            logger.error(f"Error streaming completion: {str(e)}")
+            raise
+            
+        finally:
+            await response.aclose()
+    
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=_wait_retry_after,
+        retry=retry_if_exception_type((httpx.TimeoutException, httpx.ConnectError, RateLimitError)),
+        reraise=True
+    )
+    async def _open_stream(self, payload):
+        """
+        Open a streamed chat completion request, retrying transient failures.
+        
+        Args:
+            payload: Request payload dictionary
+            
+        Returns:
+            The streamed httpx response; the caller must close it
+        """
+        request = self._client.build_request(
+            "POST",
+            f"{self.base_url}/chat/completions",
+            json=payload
+        )
+        response = await self._client.send(request, stream=True)
+        
+        if response.status_code in (429, 503):
+            await response.aclose()
+            raise RateLimitError(response)
+        
+        if response.is_error:
+            await response.aread()
+            await response.aclose()
+            response.raise_for_status()
+        
+        return response
+    
+    def _build_payload(self, prompt, model, temperature, system=None, cache_prefix=False, messages=None):
+        """
+        Build the request body for a chat completion.
+        
+        Args:
+            prompt: The user prompt
+            model: The model the request is sent to
+            temperature: The creativity temperature
+            system: Optional system prompt
+            cache_prefix: Mark the system prompt as cacheable
+            messages: Complete chat messages, used instead of prompt/system
+            
+        Returns:
+            Request payload dictionary
+        """
+        if messages is None:
+            messages = self._build_messages(prompt, system)
+        
+        system = next(
+            (m["content"] for m in messages if m["role"] == "system" and isinstance(m["content"], str)),
+            None
+        )
+        
+        if system and cache_prefix and model.startswith("anthropic/"):
+            messages = self._mark_system_cacheable(messages)
+        
+        payload = {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": self.max_tokens
+        }
+        
+        # OpenAI caches long prefixes automatically; the key routes requests
+        # sharing a prefix to the same cache
+        if system and cache_prefix and model.startswith("openai/"):
+            payload["prompt_cache_key"] = hashlib.sha256(system.encode()).hexdigest()[:32]
+        
+        return payload
+    
+    def _build_messages(self, prompt, system=None):
+        """
+        Build the chat messages for a single-prompt completion request.
+        
+        Args:
+            prompt: The user prompt
+            system: Optional system prompt
+            
+        Returns:
+            List of chat messages
+        """
+        messages = []
+        
+        if system:
+            messages.append({"role": "system", "content": system})
+        
+        messages.append({"role": "user", "content": prompt})
+        return messages
+    
+    def _mark_system_cacheable(self, messages):
+        """
+        Mark the system message with Anthropic's cache breakpoint.
+        
+        Anthropic only caches blocks explicitly marked with cache_control.
+        The caller's list is left untouched.
+        
+        Args:
+            messages: List of chat messages
+            
+        Returns:
+            List of chat messages with the system message marked
+        """
+        marked = []
+        
+        for message in messages:
+            if message["role"] == "system" and isinstance(message["content"], str):
+                message = {
+                    "role": "system",
+                    "content": [{
+                        "type": "text",
+                        "text": message["content"],
+                        "cache_control": {"type": "ephemeral"}
+                    }]
+                }
+            marked.append(message)
+        
+        return marked
+    
     async def generate_embedding(self, text):
         """
         Generate an embedding vector for the given text.
@@ -112,33 +401,50 @@ class OpenRouterClient:
         Returns:
             The embedding vector
         """
+        embeddings = await self._request_embeddings([text])
+        return embeddings[0]
+    
+    async def _request_embeddings(self, texts):
+        """
+        Request embeddings for several texts in one API call.
+        
+        Args:
+            texts: The texts to embed
+            
+        Returns:
+            List of embedding vectors, in the order of texts
+        """
         # Default to OpenAI's embedding model, typically available through OpenRouter
         embedding_model = "openai/text-embedding-ada-002"
         
         try:
-            response = requests.post(
+            response = await self._client.post(
                 f"{self.base_url}/embeddings",
-                headers=self.headers,
                 json={
                     "model": embedding_model,
-                    "input": text
+                    "input": texts
                 },
                 timeout=15
             )
             
             response.raise_for_status()
-            response_json = response.json()
+            response_json = _json_loads(response.content)
             
-            # Extract the embedding
-            if "data" in response_json and len(response_json["data"]) > 0:
-                return response_json["data"][0]["embedding"]
-            else:
+            # Extract the embeddings (the API may return them in any order)
+            data = response_json.get("data") or []
+            if len(data) != len(texts):
                 logger.error(f"Unexpected API response: {response_json}")
                 raise ValueError("Failed to get embedding from API")
+            
+            return [item["embedding"] for item in sorted(data, key=lambda item: item.get("index", 0))]
                 
         except Exception as e:
             logger.error(f"Error generating embedding: {str(e)}")
             raise
+    
+    async def aclose(self):
+        """Close the underlying HTTP connections."""
+        await self._client.aclose()
 
 def setup_llm_client(config):
     """
@@ -9,6 +9,8 @@ This module contains prompt templates used for different purposes when
 communicating with language models.
 """
 
+import string
+
 # Base system prompt that defines Olodymyr's personality and behavior
 SYSTEM_PROMPT = """
 You are Olodymyr, a helpful and educational AI assistant with expertise in various subjects. 
@@ -37,16 +39,12 @@ If you don't know something:
 Use emojis sparingly to emphasize key points, but don't overuse them.
 """
 
-# Prompt template for normal conversation with context
+# Prompt template for the latest turn of a conversation (the system prompt
+# and history are sent as earlier messages so they stay a cacheable prefix)
 CONVERSATION_PROMPT_TEMPLATE = """
-{system_prompt}
-
 User profile and preferences:
 {user_preferences}
 
-Conversation history:
-{conversation_history}
-
 Relevant information from your memory:
 {relevant_memories}
 
@@ -56,6 +54,30 @@ Current message from user:
 Respond to the user as Olodymyr, providing a helpful, educational response:
 """
 
+# The conversation template is rendered on every message, so it is split into
+# its literal parts once here instead of being re-parsed by str.format
+_CONVERSATION_PARTS = list(string.Formatter().parse(CONVERSATION_PROMPT_TEMPLATE))
+if [field for _, field, _, _ in _CONVERSATION_PARTS] != [
+    "user_preferences", "relevant_memories", "user_message", None
+]:
+    raise ValueError("render_conversation must match CONVERSATION_PROMPT_TEMPLATE")
+_CONVERSATION_LITERALS = tuple(literal for literal, _, _, _ in _CONVERSATION_PARTS)
+
+def render_conversation(user_preferences, relevant_memories, user_message):
+    """
+    Render CONVERSATION_PROMPT_TEMPLATE; same result as .format() with these fields.
+    
+    Args:
+        user_preferences: User profile and preferences text
+        relevant_memories: Formatted relevant memories
+        user_message: The user's message
+        
+    Returns:
+        The rendered prompt
+    """
+    p0, p1, p2, p3 = _CONVERSATION_LITERALS
+    return "".join((p0, user_preferences, p1, relevant_memories, p2, user_message, p3))
+
 # Prompt template for synthesizing information for learning
 LEARNING_SYNTHESIS_TEMPLATE = """
 You are helping to prepare information for storage in your memory. 
@@ -92,6 +114,18 @@ Remember to:
 Keep your tone warm and encouraging, like a supportive teacher.
 """
 
+# Static instructions for /recall, sent as the system message so providers
+# can cache them; only the session content varies between requests
+TEACHING_SYSTEM_PROMPT = """
+You are Olodymyr, an educational AI assistant. 
+You need to explain the following information in a clear, educational way, 
+as if you're a friendly professor teaching a student. 
+Use examples where appropriate and organize your explanation well.
+
+Remember to keep a friendly tone, use moderate emojis where appropriate, 
+and make the explanation engaging and easy to understand.
+"""
+
 # Template for generating metadata for memory storage
 METADATA_GENERATION_TEMPLATE = """
 Please analyze the following content and extract key information:
@@ -10,6 +10,7 @@ configuring all necessary components and starting the Telegram bot.
 """
 
 import os
+import sys
 import json
 import logging
 import asyncio
@@ -31,16 +32,37 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Ensure necessary directories exist
 os.makedirs("logs", exist_ok=True)
 os.makedirs("data", exist_ok=True)
 os.makedirs("chroma_db", exist_ok=True)
 
+# Import components up front so their import cost is paid at startup rather
+# than by the first request
+try:
+    from bot.telegram_bot import setup_telegram_bot
+    from memory.memory_api import setup_memory_systems
+    from llms.openrouter_client import setup_llm_client
+    from core.context_manager import ContextManager
+    from core.learning_engine import LearningEngine
+    from core.personality import PersonalityEngine
+    from tools import web_scraper
+except ImportError as e:
+    logger.error(f"Failed to import required modules: {e}")
+    logger.error("Please check that all dependencies are installed.")
+    raise SystemExit(1)
+
 def load_config():
     """Load configuration from config.json file and environment variables."""
     try:
-        with open("config.json", "r") as config_file:
-            config = json.load(config_file)
+        with open("config.json", "rb") as config_file:
+            # orjson.JSONDecodeError subclasses json.JSONDecodeError
+            config = orjson.loads(config_file.read()) if orjson else json.load(config_file)
         
         # Override config with environment variables if available
         if os.getenv("TELEGRAM_BOT_TOKEN"):
@@ -65,6 +87,29 @@ def load_config():
         logger.error("Config file is not valid JSON. Please check the format.")
         raise
 
+def install_event_loop():
+    """
+    Use uvloop for the asyncio event loop when available.
+    
+    Must be called before the event loop is created (i.e. before asyncio.run).
+    uvloop does not support Windows, where the default loop is kept.
+    
+    Returns:
+        True if uvloop was installed
+    """
+    if sys.platform == "win32":
+        return False
+    
+    try:
+        import uvloop
+    except ImportError:
+        logger.info("uvloop not installed, using the default asyncio event loop")
+        return False
+    
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    logger.info("Using uvloop event loop")
+    return True
+
 async def main():
     """Initialize and run the Olodymyr AI assistant."""
     # Load configuration
@@ -72,14 +117,6 @@ async def main():
     logger.info(f"Starting {config['bot_name']} v{config['version']}")
     
     try:
-        # Import components (done here to handle import errors gracefully)
-        from bot.telegram_bot import setup_telegram_bot
-        from memory.memory_api import setup_memory_systems
-        from llms.openrouter_client import setup_llm_client
-        from core.context_manager import ContextManager
-        from core.learning_engine import LearningEngine
-        from core.personality import PersonalityEngine
-        
         # Initialize memory systems
         logger.info("Setting up memory systems...")
         memory_system = await setup_memory_systems(config)
@@ -107,17 +144,22 @@ async def main():
         logger.info(f"{config['bot_name']} is now running!")
         
         # Keep the bot running until interrupted
-        await bot.idle()
+        try:
+            await bot.idle()
+        finally:
+            await memory_system.close()
+            await llm_client.aclose()
+            await web_scraper.close()
         
-    except ImportError as e:
-        logger.error(f"Failed to import required modules: {e}")
-        logger.error("Please check that all dependencies are installed.")
     except Exception as e:
         logger.error(f"An error occurred during initialization: {e}")
         raise
 
 if __name__ == "__main__":
     try:
+        # Switch to uvloop before the event loop is created
+        install_event_loop()
+        
         # Create event loop and run main function
         asyncio.run(main())
     except KeyboardInterrupt:
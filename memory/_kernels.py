@@ -0,0 +1,163 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Vector Kernels for Olodymyr AI Assistant
+
+This module holds the similarity kernels used by the in-process vector
+stores, and the chunk boundary kernel used when ingesting learned content.
+They are JIT-compiled with Numba when it is installed, with a NumPy (or, for
+chunking, pure-Python) fallback otherwise.
+"""
+
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    logger.warning("numba not installed, using uncompiled kernels")
+    NUMBA_AVAILABLE = False
+
+if NUMBA_AVAILABLE:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _int8_dot_kernel(query, mat, out):
+        """
+        Write the int32 dot product of query with each row of mat into out.
+        
+        Args:
+            query: int8 vector of shape (dim,)
+            mat: C-contiguous int8 matrix of shape (n, dim)
+            out: float32 output vector of shape (n,)
+        """
+        for i in prange(mat.shape[0]):
+            s = 0
+            for j in range(mat.shape[1]):
+                s += np.int32(query[j]) * np.int32(mat[i, j])
+            out[i] = s
+
+    @njit(cache=True)
+    def _is_space(c):
+        # Same set as str.isspace()
+        return (
+            (9 <= c <= 13) or (28 <= c <= 32) or c == 0x85 or c == 0xA0
+            or c == 0x1680 or (0x2000 <= c <= 0x200A) or c == 0x2028 or c == 0x2029
+            or c == 0x202F or c == 0x205F or c == 0x3000
+        )
+    
+    @njit(cache=True)
+    def _snap_end(codes, end, low):
+        # Closest break in codes[low:end], strongest first: "\n\n", ". ", "\n", " "
+        for i in range(end - 2, low - 1, -1):
+            if codes[i] == 10 and codes[i + 1] == 10:
+                return i + 2
+        for i in range(end - 2, low - 1, -1):
+            if codes[i] == 46 and codes[i + 1] == 32:
+                return i + 2
+        for i in range(end - 1, low - 1, -1):
+            if codes[i] == 10:
+                return i + 1
+        for i in range(end - 1, low - 1, -1):
+            if codes[i] == 32:
+                return i + 1
+        return end
+    
+    @njit(cache=True)
+    def _snap_start(codes, start, high):
+        # Just after the first break in codes[start:high], strongest first
+        for i in range(start, high - 1):
+            if codes[i] == 10 and codes[i + 1] == 10:
+                return i + 2
+        for i in range(start, high - 1):
+            if codes[i] == 46 and codes[i + 1] == 32:
+                return i + 2
+        for i in range(start, high):
+            if codes[i] == 10:
+                return i + 1
+        for i in range(start, high):
+            if codes[i] == 32:
+                return i + 1
+        return start
+    
+    @njit(cache=True)
+    def _chunk_offsets(codes, chunk_size, stride, tolerance):
+        """
+        Compute sliding-window chunk boundaries over code points.
+        
+        Args:
+            codes: uint32 code points of the text
+            chunk_size: Chunk size in characters
+            stride: Distance between chunk starts, 1 <= stride <= chunk_size
+            tolerance: How far boundaries may move to reach a break
+            
+        Returns:
+            int64 array of shape (n, 2) with (start, end) offsets
+        """
+        length = codes.shape[0]
+        
+        # Starts advance by at least stride, which bounds the number of spans
+        spans = np.empty((length // stride + 2, 2), dtype=np.int64)
+        count = 0
+        start = 0
+        
+        while start < length:
+            end = min(start + chunk_size, length)
+            if end < length:
+                end = _snap_end(codes, end, max(start + 1, end - tolerance))
+            
+            for i in range(start, end):
+                if not _is_space(codes[i]):
+                    spans[count, 0] = start
+                    spans[count, 1] = end
+                    count += 1
+                    break
+            
+            if end >= length:
+                break
+            
+            next_start = start + stride
+            start = max(_snap_start(codes, next_start, min(length, next_start + tolerance)), start + 1)
+        
+        return spans[:count]
+
+def chunk_offsets(text, chunk_size, stride, tolerance):
+    """
+    Compute sliding-window chunk boundaries with the compiled kernel.
+    
+    Gives the same boundaries as MemoryAPI._chunk_spans. Only available with
+    Numba; check NUMBA_AVAILABLE first.
+    
+    Args:
+        text: Text to split
+        chunk_size: Chunk size in characters
+        stride: Distance between chunk starts, 1 <= stride <= chunk_size
+        tolerance: How far boundaries may move to reach a break
+        
+    Returns:
+        List of (start, end) offsets into text
+    """
+    # UTF-32 gives one array element per character, so offsets match str indices
+    codes = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+    return [tuple(span) for span in _chunk_offsets(codes, chunk_size, stride, tolerance).tolist()]
+
+def int8_dot_scores(query, mat):
+    """
+    Compute the dot product of an int8 query with every row of an int8 matrix.
+    
+    Args:
+        query: int8 vector of shape (dim,)
+        mat: C-contiguous int8 matrix of shape (n, dim)
+        
+    Returns:
+        float32 vector of shape (n,)
+    """
+    if NUMBA_AVAILABLE:
+        out = np.empty(mat.shape[0], dtype=np.float32)
+        _int8_dot_kernel(query, mat, out)
+        return out
+    
+    # Widen before multiplying so the products don't overflow int8
+    return (mat.astype(np.int32) @ query.astype(np.int32)).astype(np.float32)
@@ -11,15 +11,152 @@ This module implements vector storage using ChromaDB for semantic memory.
 import os
 import logging
 import asyncio
+import functools
 from typing import List, Dict, Any, Optional
 import chromadb
 from chromadb.config import Settings
 
 logger = logging.getLogger(__name__)
 
+# Files of the duckdb+parquet store written by ChromaDB before 0.4; newer
+# clients can't read it and start an empty store next to it
+_LEGACY_STORE_FILES = ("chroma-collections.parquet", "chroma-embeddings.parquet")
+
+# Opened clients and collections, keyed by (store location, collection_name,
+# embedding_type, embedding_model, embedding_dimensions), so re-initializing
+# doesn't reopen the store or reconnect to the server
+_CLIENT_CACHE = {}
+
+# Embedding models whose leading dimensions can be stored on their own
+_MATRYOSHKA_MODEL_PREFIX = "text-embedding-3-"
+
+class _TruncatedEmbeddingFunction:
+    """
+    Embedding function wrapper that keeps only the leading dimensions.
+    
+    Models trained with Matryoshka representation learning (OpenAI's
+    text-embedding-3 family) keep most of their retrieval
+    quality in the first dimensions, so storing a prefix shrinks the
+    collection's vectors and HNSW index in proportion.
+    """
+    
+    def __init__(self, embedding_function, dimensions):
+        """
+        Initialize the wrapper.
+        
+        Args:
+            embedding_function: ChromaDB embedding function to wrap
+            dimensions: Number of leading dimensions to keep
+        """
+        self.embedding_function = embedding_function
+        self.dimensions = dimensions
+    
+    def __call__(self, input):
+        embeddings = []
+        for embedding in self.embedding_function(input):
+            prefix = [float(x) for x in embedding[:self.dimensions]]
+            
+            # Re-normalize so cosine distances stay comparable
+            norm = sum(x * x for x in prefix) ** 0.5 or 1.0
+            embeddings.append([x / norm for x in prefix])
+        return embeddings
+
+@functools.lru_cache(maxsize=None)
+def _embedding_function(embedding_type, model_name=None, dimensions=None):
+    """
+    Create the embedding function for a configured type, once per type.
+    
+    Args:
+        embedding_type: Embedding function name from the config
+        model_name: Embedding model (default: all-MiniLM-L6-v2 for "local",
+            text-embedding-ada-002 for "openai")
+        dimensions: Optional number of leading dimensions to store; only
+            supported for OpenAI text-embedding-3 models
+        
+    Returns:
+        ChromaDB embedding function, or None for Chroma's default
+        
+    Raises:
+        ValueError: If dimensions is set for a model that can't be truncated
+    """
+    if dimensions and not (embedding_type == "openai" and (model_name or "").startswith(_MATRYOSHKA_MODEL_PREFIX)):
+        # Other models spread information over all dimensions, so a prefix
+        # of their embeddings retrieves poorly
+        raise ValueError(
+            f"embedding_dimensions requires an OpenAI {_MATRYOSHKA_MODEL_PREFIX}* model, "
+            f"got {embedding_type} {model_name or '(default model)'}"
+        )
+    
+    embedding_function = _base_embedding_function(embedding_type, model_name)
+    
+    if dimensions and embedding_function is not None:
+        from chromadb.utils import embedding_functions
+        
+        # Without an API key the OpenAI type falls back to Chroma's default model
+        if not isinstance(embedding_function, embedding_functions.OpenAIEmbeddingFunction):
+            logger.warning("Not truncating embeddings of the fallback embedding function")
+            return embedding_function
+        
+        logger.info("Storing the first %d embedding dimensions", dimensions)
+        return _TruncatedEmbeddingFunction(embedding_function, dimensions)
+    
+    return embedding_function
+
+def _base_embedding_function(embedding_type, model_name=None):
+    """
+    Create the embedding function for a configured type.
+    
+    Args:
+        embedding_type: Embedding function name from the config
+        model_name: Optional embedding model
+        
+    Returns:
+        ChromaDB embedding function, or None for Chroma's default
+    """
+    if embedding_type == "local":
+        try:
+            from chromadb.utils import embedding_functions
+            
+            # Runs in-process, so queries don't wait on an embeddings API
+            model_name = model_name or "all-MiniLM-L6-v2"
+            logger.info("Using local embedding function: %s", model_name)
+            return embedding_functions.SentenceTransformerEmbeddingFunction(model_name=model_name)
+            
+        except ImportError:
+            logger.warning("sentence-transformers not installed, using default embedding function")
+            return None
+    
+    if embedding_type == "openai":
+        try:
+            from chromadb.utils import embedding_functions
+            
+            # If OpenAI API key is provided, use OpenAI embeddings
+            openai_api_key = os.environ.get("OPENAI_API_KEY")
+            if openai_api_key:
+                model_name = model_name or "text-embedding-ada-002"
+                logger.info("Using OpenAI embedding function: %s", model_name)
+                return embedding_functions.OpenAIEmbeddingFunction(
+                    api_key=openai_api_key,
+                    model_name=model_name
+                )
+            else:
+                # Fall back to default embedding function
+                logger.info("Using default embedding function (OpenAI API key not found)")
+                return embedding_functions.DefaultEmbeddingFunction()
+                
+        except ImportError:
+            logger.warning("ChromaDB OpenAI embedding functions not available, using default")
+            return None
+    
+    logger.info("Using default embedding function")
+    return None
+
 class ChromaMemory:
     """
     ChromaDB-based vector memory storage.
+    
+    ChromaDB is synchronous (disk I/O and HNSW traversal), so every
+    collection call runs in a worker thread to keep the event loop free.
     """
     
     def __init__(self, config):
@@ -32,11 +169,15 @@ class ChromaMemory:
         self.config = config
         self.persist_directory = config["chromadb"].get("persist_directory", "./chroma_db")
         self.collection_name = config["chromadb"].get("collection_name", "olodymyr_memories")
+        
+        # A configured host switches from the embedded store to a Chroma server
+        self.host = config["chromadb"].get("host")
+        self.port = config["chromadb"].get("port", 8000)
         self.embedding_function = None
         self.client = None
         self.collection = None
         
-        logger.info(f"ChromaMemory initialized with persist_directory: {self.persist_directory}")
+        logger.info("ChromaMemory initialized with persist_directory: %s", self.persist_directory)
     
     async def initialize(self):
         """
@@ -46,56 +187,87 @@ class ChromaMemory:
             True if successful
         """
         try:
-            # Ensure persist directory exists
-            os.makedirs(self.persist_directory, exist_ok=True)
-            
-            # Create client
-            self.client = chromadb.Client(Settings(
-                persist_directory=self.persist_directory,
-                chroma_db_impl="duckdb+parquet",
-            ))
-            
             # Set up embedding function based on config
             embedding_type = self.config["chromadb"].get("embedding_function", "openai")
+            model_key = "openai_embedding_model" if embedding_type == "openai" else "embedding_model"
+            model_name = self.config["chromadb"].get(model_key)
+            dimensions = self.config["chromadb"].get("embedding_dimensions")
             
-            if embedding_type == "openai":
-                try:
-                    from chromadb.utils import embedding_functions
-                    
-                    # If OpenAI API key is provided, use OpenAI embeddings
-                    openai_api_key = os.environ.get("OPENAI_API_KEY")
-                    if openai_api_key:
-                        self.embedding_function = embedding_functions.OpenAIEmbeddingFunction(
-                            api_key=openai_api_key,
-                            model_name="text-embedding-ada-002"
-                        )
-                        logger.info("Using OpenAI embedding function")
-                    else:
-                        # Fall back to default embedding function
-                        self.embedding_function = embedding_functions.DefaultEmbeddingFunction()
-                        logger.info("Using default embedding function (OpenAI API key not found)")
-                        
-                except ImportError:
-                    logger.warning("ChromaDB OpenAI embedding functions not available, using default")
-                    self.embedding_function = None
-            else:
-                self.embedding_function = None
-                logger.info("Using default embedding function")
-            
-            # Get or create collection
-            self.collection = self.client.get_or_create_collection(
-                name=self.collection_name,
-                embedding_function=self.embedding_function,
-                metadata={"description": "Olodymyr's memories"}
+            # Local models load in the constructor; keep that off the event loop
+            # and out of the first query
+            self.embedding_function = await asyncio.to_thread(
+                _embedding_function, embedding_type, model_name, dimensions
             )
             
-            logger.info(f"ChromaDB collection '{self.collection_name}' initialized")
+            location = (self.host, self.port) if self.host else self.persist_directory
+            key = (location, self.collection_name, embedding_type, model_name, dimensions)
+            cached = _CLIENT_CACHE.get(key)
+            
+            if cached is None:
+                client = await asyncio.to_thread(self._create_client)
+                
+                # Get or create collection (HNSW parameters only apply on creation)
+                collection = await asyncio.to_thread(
+                    client.get_or_create_collection,
+                    name=self.collection_name,
+                    embedding_function=self.embedding_function,
+                    metadata={
+                        "description": "Olodymyr's memories",
+                        "hnsw:space": "cosine",
+                        "hnsw:M": 16,
+                        "hnsw:construction_ef": 100
+                    }
+                )
+                
+                cached = _CLIENT_CACHE[key] = (client, collection)
+            
+            self.client, self.collection = cached
+            
+            # The distance space is fixed when a collection is created
+            space = (self.collection.metadata or {}).get("hnsw:space", "l2")
+            if space != "cosine":
+                logger.warning(
+                    "ChromaDB collection '%s' uses %s distances, not cosine; re-index it "
+                    "as described in docs/INTEGRATION_GUIDE.md",
+                    self.collection_name, space
+                )
+            
+            logger.info("ChromaDB collection '%s' initialized", self.collection_name)
             return True
             
         except Exception as e:
-            logger.error(f"Failed to initialize ChromaDB: {e}")
+            logger.error("Failed to initialize ChromaDB: %s", e)
             raise
     
+    def _create_client(self):
+        """
+        Create the ChromaDB client for the configured store.
+        
+        The client is created once per store and shared by every operation;
+        against a server, its HTTP session keeps connections open between calls.
+        
+        Returns:
+            ChromaDB client
+        """
+        settings = Settings(anonymized_telemetry=False)
+        
+        if self.host:
+            logger.info("Connecting to ChromaDB server at %s:%s", self.host, self.port)
+            return chromadb.HttpClient(host=self.host, port=self.port, settings=settings)
+        
+        # Ensure persist directory exists
+        os.makedirs(self.persist_directory, exist_ok=True)
+        
+        if any(os.path.exists(os.path.join(self.persist_directory, name)) for name in _LEGACY_STORE_FILES):
+            logger.warning(
+                "Found a legacy duckdb+parquet ChromaDB store in %s; its memories are not loaded. "
+                "See 'Migrating an existing store' in docs/INTEGRATION_GUIDE.md",
+                self.persist_directory
+            )
+        
+        # Create client (SQLite + HNSW on disk)
+        return chromadb.PersistentClient(path=self.persist_directory, settings=settings)
+    
     async def add_vector(self, id: str, text: str, metadata: Dict = None) -> bool:
         """
         Add a vector to the collection.
@@ -109,7 +281,8 @@ class ChromaMemory:
             True if successful
         """
         try:
-            self.collection.add(
+            await asyncio.to_thread(
+                self.collection.add,
                 ids=[id],
                 documents=[text],
                 metadatas=[metadata or {}]
@@ -117,7 +290,39 @@ class ChromaMemory:
             return True
             
         except Exception as e:
-            logger.error(f"Failed to add vector: {e}")
+            logger.error("Failed to add vector: %s", e)
+            return False
+    
+    async def add_vectors_batch(self, ids: List[str], texts: List[str], metadatas: List[Dict] = None) -> bool:
+        """
+        Add several vectors to the collection in one call.
+        
+        The embedding function is called once for the whole batch and the
+        vectors are written in a single transaction. Existing IDs are
+        overwritten, so re-storing a session's chunks is idempotent.
+        
+        Args:
+            ids: Unique identifiers
+            texts: Text contents, in the order of ids
+            metadatas: Optional metadata, in the order of ids
+            
+        Returns:
+            True if successful
+        """
+        if not ids:
+            return True
+        
+        try:
+            await asyncio.to_thread(
+                self.collection.upsert,
+                ids=ids,
+                documents=texts,
+                metadatas=metadatas or [{} for _ in ids]
+            )
+            return True
+            
+        except Exception as e:
+            logger.error("Failed to add %d vectors: %s", len(ids), e)
             return False
     
     async def search(self, query: str, limit: int = 5) -> List[Dict]:
@@ -132,7 +337,8 @@ class ChromaMemory:
             List of relevant documents with metadata
         """
         try:
-            results = self.collection.query(
+            results = await asyncio.to_thread(
+                self.collection.query,
                 query_texts=[query],
                 n_results=limit
             )
@@ -155,7 +361,7 @@ class ChromaMemory:
             return formatted_results
             
         except Exception as e:
-            logger.error(f"Failed to search vectors: {e}")
+            logger.error("Failed to search vectors: %s", e)
             return []
     
     async def delete_vectors(self, session_id: str) -> bool:
@@ -169,21 +375,16 @@ class ChromaMemory:
             True if successful
         """
         try:
-            # Get all IDs with this session_id in metadata
-            results = self.collection.get(
+            # Chroma filters on the metadata itself, no need to fetch the IDs first
+            await asyncio.to_thread(
+                self.collection.delete,
                 where={"session_id": session_id}
             )
             
-            if results and "ids" in results and results["ids"]:
-                # Delete the vectors
-                self.collection.delete(
-                    ids=results["ids"]
-                )
-            
             return True
             
         except Exception as e:
-            logger.error(f"Failed to delete vectors for session {session_id}: {e}")
+            logger.error("Failed to delete vectors for session %s: %s", session_id, e)
             return False
     
     async def count_vectors(self) -> int:
@@ -194,8 +395,8 @@ class ChromaMemory:
             Number of vectors
         """
         try:
-            return self.collection.count()
+            return await asyncio.to_thread(self.collection.count)
             
         except Exception as e:
-            logger.error(f"Failed to count vectors: {e}")
+            logger.error("Failed to count vectors: %s", e)
             return 0
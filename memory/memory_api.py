@@ -11,15 +11,110 @@ coordinating between ChromaDB for vector storage and Supabase for relational dat
 
 import logging
 import asyncio
-from typing import Dict, List, Optional, Any
+import uuid
+import functools
+import itertools
+import re
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Any, Iterator
+from cachetools import TTLCache
 
 logger = logging.getLogger(__name__)
 
+# Compiled chunk boundary kernel for bulk ingestion, if Numba is available
+try:
+    from memory import _kernels
+    _COMPILED_CHUNKER = _kernels.NUMBA_AVAILABLE
+except ImportError:
+    _COMPILED_CHUNKER = False
+
+# Below this length the compiled kernel's setup outweighs its speedup
+_COMPILED_CHUNKER_MIN_LENGTH = 100_000
+
+@functools.lru_cache(maxsize=10_000)
+def _uid_key(user_id) -> str:
+    """
+    Convert a Telegram user ID to the key used by the storage backends.
+    
+    User IDs stay integers in the bot and are only stringified here, at the
+    storage boundary (the format matches existing rows).
+    """
+    return str(user_id)
+
+def _session_size(session: Dict) -> int:
+    """Size of a cached learning session, in characters of content."""
+    return len(session.get("content") or "") + 1
+
+@functools.lru_cache(maxsize=None)
+def _load_tokenizer(name: str):
+    """
+    Load a Hugging Face tokenizer, once per name.
+    
+    Args:
+        name: Tokenizer name on the Hugging Face Hub
+        
+    Returns:
+        tokenizers.Tokenizer, or None if it can't be loaded
+    """
+    try:
+        from tokenizers import Tokenizer
+    except ImportError:
+        logger.warning("tokenizers library not installed, chunking by characters")
+        return None
+    
+    try:
+        return Tokenizer.from_pretrained(name)
+    except Exception as e:
+        logger.warning(f"Failed to load tokenizer {name}, chunking by characters: {e}")
+        return None
+
+# Preferred chunk boundaries, strongest first
+_BREAKS = ("\n\n", ". ", "\n", " ")
+
+# Finds any content in a span without copying it out of the text
+_NON_SPACE = re.compile(r"\S")
+
+def _snap_end(text: str, end: int, low: int) -> int:
+    """
+    Move a chunk end back to the closest break in text[low:end].
+    
+    Returns:
+        The new end offset, or end if there is no break in range
+    """
+    for separator in _BREAKS:
+        index = text.rfind(separator, low, end)
+        if index != -1:
+            return index + len(separator)
+    return end
+
+def _snap_start(text: str, start: int, high: int) -> int:
+    """
+    Move a chunk start forward to just after the first break in text[start:high].
+    
+    Returns:
+        The new start offset, or start if there is no break in range
+    """
+    for separator in _BREAKS:
+        index = text.find(separator, start, high)
+        if index != -1:
+            return index + len(separator)
+    return start
+
 class MemoryAPI:
     """
     Unified API for accessing and managing Olodymyr's memory systems.
     """
     
+    __slots__ = (
+        "chroma_memory", "supabase_store", "config",
+        "short_term_limit", "working_memory_tokens",
+        "chunk_size", "chunk_stride", "vector_batch_size",
+        "chunk_tokenizer", "chunk_tokens", "chunk_token_stride",
+        "_sessions_by_id", "_sessions_by_name", "_preferences",
+        "history_flush_interval", "_pending_history", "_history_ready",
+        "_history_lock", "_history_flusher", "_last_history_time"
+    )
+    
     def __init__(self, chroma_memory, supabase_store, config):
         """
         Initialize the Memory API.
@@ -37,6 +132,37 @@ class MemoryAPI:
         self.short_term_limit = config["memory"].get("short_term_limit", 10)
         self.working_memory_tokens = config["memory"].get("working_memory_tokens", 2000)
         self.chunk_size = config["memory"].get("max_learning_chunk_size", 500)
+        self.chunk_stride = config["memory"].get("chunk_stride") or int(0.75 * self.chunk_size)
+        self.vector_batch_size = config["memory"].get("vector_batch_size", 64)
+        
+        # With a tokenizer configured, chunks are sized in the embedding
+        # model's tokens instead of characters
+        self.chunk_tokenizer = config["memory"].get("chunk_tokenizer")
+        self.chunk_tokens = config["memory"].get("chunk_tokens", 256)
+        self.chunk_token_stride = config["memory"].get("chunk_token_stride") or int(0.75 * self.chunk_tokens)
+        
+        # Read-mostly lookups on the message path are served from RAM for a
+        # short time; writes through this API invalidate them
+        cache_ttl = config["memory"].get("cache_ttl_seconds", 60)
+        cache_size = config["memory"].get("cache_max_entries", 1024)
+        self._sessions_by_id = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+        # Sessions carry their full content, so this one is bounded by the
+        # total number of characters held rather than by entry count
+        self._sessions_by_name = TTLCache(
+            maxsize=config["memory"].get("session_cache_max_chars", 5_000_000),
+            ttl=cache_ttl,
+            getsizeof=_session_size
+        )
+        self._preferences = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+        
+        # Conversation messages are written behind: queued per user and
+        # flushed together, one insert per user, every history_flush_interval
+        self.history_flush_interval = config["memory"].get("history_flush_interval", 0.05)
+        self._pending_history = {}
+        self._history_ready = asyncio.Event()
+        self._history_lock = asyncio.Lock()
+        self._history_flusher = None
+        self._last_history_time = datetime.min
         
         logger.info("Memory API initialized")
     
@@ -47,22 +173,24 @@ class MemoryAPI:
         Returns:
             True if successful, False otherwise
         """
-        try:
-            # Initialize ChromaDB
-            await self.chroma_memory.initialize()
-            
-            # Initialize Supabase
-            await self.supabase_store.initialize()
-            
-            return True
-            
-        except Exception as e:
-            logger.error(f"Failed to set up memory systems: {e}")
-            return False
+        # ChromaDB and Supabase are independent; bring them up together
+        results = await asyncio.gather(
+            self.chroma_memory.initialize(),
+            self.supabase_store.initialize(),
+            return_exceptions=True
+        )
+        
+        failed = False
+        for name, result in zip(("ChromaDB", "Supabase"), results):
+            if isinstance(result, Exception):
+                logger.error(f"Failed to set up {name}: {result}")
+                failed = True
+        
+        return not failed
     
     # Context management functions
     
-    async def get_conversation_history(self, user_id: str, message_limit: int = None) -> List[Dict]:
+    async def get_conversation_history(self, user_id: int, message_limit: int = None) -> List[Dict]:
         """
         Get conversation history for a user.
         
@@ -73,24 +201,47 @@ class MemoryAPI:
         Returns:
             List of message dictionaries
         """
+        # Queued messages are part of the history; write them before reading
+        if user_id in self._pending_history or self._history_lock.locked():
+            await self.flush_history()
+        
         limit = message_limit or self.short_term_limit
-        return await self.supabase_store.get_conversation_history(user_id, limit)
+        return await self.supabase_store.get_conversation_history(_uid_key(user_id), limit)
     
-    async def add_message_to_history(self, user_id: str, role: str, content: str) -> bool:
+    async def add_message_to_history(self, user_id: int, role: str, content: str) -> bool:
         """
         Add a message to the conversation history.
         
+        The message is queued and written with the next flush.
+        
         Args:
             user_id: The user's ID
             role: Message role ('user' or 'assistant')
             content: Message content
             
         Returns:
-            True if successful, False otherwise
+            True once queued
         """
-        return await self.supabase_store.add_message_to_history(user_id, role, content)
+        self._queue_history(user_id, [{"role": role, "content": content}])
+        return True
     
-    async def clear_conversation_history(self, user_id: str) -> bool:
+    async def add_messages_bulk(self, user_id: int, messages: List[Dict]) -> bool:
+        """
+        Add several messages to the conversation history.
+        
+        The messages are queued and written with the next flush.
+        
+        Args:
+            user_id: The user's ID
+            messages: List of {"role", "content"} dictionaries, in order
+            
+        Returns:
+            True once queued
+        """
+        self._queue_history(user_id, messages)
+        return True
+    
+    async def clear_conversation_history(self, user_id: int) -> bool:
         """
         Clear conversation history for a user.
         
@@ -100,11 +251,96 @@ class MemoryAPI:
         Returns:
             True if successful, False otherwise
         """
-        return await self.supabase_store.clear_conversation_history(user_id)
+        self._pending_history.pop(user_id, None)
+        
+        # Let an in-flight write finish first so it can't land after the clear
+        async with self._history_lock:
+            return await self.supabase_store.clear_conversation_history(_uid_key(user_id))
+    
+    def _queue_history(self, user_id: int, messages: List[Dict]):
+        """
+        Queue messages for the history writer, starting it if needed.
+        
+        Args:
+            user_id: The user's ID
+            messages: List of {"role", "content"} dictionaries, in order
+        """
+        pending = self._pending_history.setdefault(user_id, [])
+        for message in messages:
+            pending.append({
+                "role": message["role"],
+                "content": message["content"],
+                "timestamp": self._next_history_timestamp()
+            })
+        
+        if self._history_flusher is None:
+            self._history_flusher = asyncio.create_task(self._flush_history_loop())
+        self._history_ready.set()
+    
+    def _next_history_timestamp(self) -> str:
+        """
+        Get a timestamp for a queued message.
+        
+        History is ordered by timestamp, so timestamps are kept strictly
+        increasing even for messages queued within the same microsecond.
+        """
+        now = max(datetime.now(), self._last_history_time + timedelta(microseconds=1))
+        self._last_history_time = now
+        return now.isoformat()
+    
+    async def _flush_history_loop(self):
+        """Write queued messages shortly after they arrive."""
+        while True:
+            await self._history_ready.wait()
+            
+            # Give concurrent writes a moment to join this batch
+            await asyncio.sleep(self.history_flush_interval)
+            self._history_ready.clear()
+            
+            # Cancelling the loop must not abort a write that's under way
+            await asyncio.shield(self.flush_history())
+    
+    async def flush_history(self) -> bool:
+        """
+        Write all queued messages now.
+        
+        Returns:
+            True if every user's messages were stored, False otherwise
+        """
+        async with self._history_lock:
+            pending, self._pending_history = self._pending_history, {}
+            if not pending:
+                return True
+            
+            results = await asyncio.gather(
+                *(
+                    self.supabase_store.add_messages_batch(_uid_key(user_id), messages)
+                    for user_id, messages in pending.items()
+                ),
+                return_exceptions=True
+            )
+            
+            failed = sum(1 for result in results if result is not True)
+            if failed:
+                logger.error(f"Failed to write conversation history for {failed} of {len(results)} users")
+            
+            return not failed
+    
+    async def close(self):
+        """
+        Stop the history writer, writing any queued messages first, and
+        close the storage connections.
+        """
+        if self._history_flusher is not None:
+            self._history_flusher.cancel()
+            self._history_flusher = None
+        
+        await asyncio.shield(self.flush_history())
+        await self.supabase_store.close()
     
     # Learning sessions functions
     
-    async def create_learning_session(self, user_id: str, name: str, content: str, 
+    async def create_learning_session(self, user_id: int, name: str, content: str, 
                                     description: str = None, source: str = None) -> str:
         """
         Create a new learning session.
@@ -120,13 +356,30 @@ class MemoryAPI:
             Session ID if successful
         """
         try:
-            # Store in Supabase first to get an ID
-            session_id = await self.supabase_store.create_learning_session(
-                user_id, name, content, description, source
+            # Allocate the ID up front so the row insert and the vector
+            # upload don't have to wait for each other
+            session_id = str(uuid.uuid4())
+            
+            results = await asyncio.gather(
+                self.supabase_store.create_learning_session(
+                    _uid_key(user_id), name, content, description, source, session_id=session_id
+                ),
+                self.process_and_store_vectors(session_id, content),
+                return_exceptions=True
             )
             
-            # Process content for vector storage
-            await self.process_and_store_vectors(session_id, content)
+            # Don't leave a session without its vectors, or vectors without
+            # their session
+            error = next((result for result in results if isinstance(result, BaseException)), None)
+            if error is not None:
+                await asyncio.gather(
+                    self.chroma_memory.delete_vectors(session_id),
+                    self.supabase_store.delete_learning_session(session_id),
+                    return_exceptions=True
+                )
+                raise error
+            
+            self._sessions_by_name.pop((user_id, name), None)
             
             return session_id
             
@@ -134,7 +387,7 @@ class MemoryAPI:
             logger.error(f"Failed to create learning session: {e}")
             raise
     
-    async def get_learning_session(self, user_id: str, name: str) -> Dict:
+    async def get_learning_session(self, user_id: int, name: str) -> Dict:
         """
         Get a learning session by name.
         
@@ -145,19 +398,28 @@ class MemoryAPI:
         Returns:
             Session data or None if not found
         """
-        return await self.supabase_store.get_learning_session_by_name(user_id, name)
+        key = (user_id, name)
+        session = self._sessions_by_name.get(key)
+        if session is None:
+            session = await self.supabase_store.get_learning_session_by_name(_uid_key(user_id), name)
+            # A session bigger than the whole cache is just not cached
+            if session is not None and _session_size(session) <= self._sessions_by_name.maxsize:
+                self._sessions_by_name[key] = session
+        return session
     
-    async def list_learning_sessions(self, user_id: str) -> List[Dict]:
+    async def list_learning_sessions(self, user_id: int, limit: int = None, offset: int = 0) -> List[Dict]:
         """
-        List all learning sessions for a user.
+        List learning sessions for a user, newest first.
         
         Args:
             user_id: The user's ID
+            limit: Optional maximum number of sessions to return
+            offset: Number of sessions to skip, when limit is given
             
         Returns:
             List of session metadata
         """
-        return await self.supabase_store.list_learning_sessions(user_id)
+        return await self.supabase_store.list_learning_sessions(_uid_key(user_id), limit, offset)
     
     async def delete_learning_session(self, session_id: str) -> bool:
         """
@@ -170,11 +432,16 @@ class MemoryAPI:
             True if successful, False otherwise
         """
         try:
-            # Delete from vector store first
-            await self.chroma_memory.delete_vectors(session_id)
+            # The vector store and Supabase are independent; delete from both at once
+            await asyncio.gather(
+                self.chroma_memory.delete_vectors(session_id),
+                self.supabase_store.delete_learning_session(session_id)
+            )
             
-            # Then delete from Supabase
-            await self.supabase_store.delete_learning_session(session_id)
+            self._sessions_by_id.pop(session_id, None)
+            for key, session in list(self._sessions_by_name.items()):
+                if session.get("id") == session_id:
+                    self._sessions_by_name.pop(key, None)
             
             return True
             
@@ -188,30 +455,34 @@ class MemoryAPI:
         """
         Process content and store as vectors.
         
+        Chunks are cut and uploaded in batches, so only one batch of chunk
+        text is held at a time and embedding starts with the first batch.
+        
         Args:
             session_id: Session ID to associate with vectors
             content: Content to process and store
             
         Returns:
             True if successful
+            
+        Raises:
+            RuntimeError: If a batch could not be stored
         """
         try:
-            # Chunk the content
-            chunks = self._chunk_text(content, self.chunk_size)
+            # Finding boundaries in large content is CPU-bound, keep it off
+            # the event loop; the offsets themselves are small
+            loop = asyncio.get_running_loop()
+            spans = await loop.run_in_executor(None, self._content_spans, content)
             
-            # Store each chunk
-            for i, chunk in enumerate(chunks):
-                metadata = {
-                    "session_id": session_id,
-                    "chunk_index": i,
-                    "total_chunks": len(chunks)
-                }
+            rows = self._iter_chunk_rows(session_id, content, spans)
+            while True:
+                batch = list(itertools.islice(rows, self.vector_batch_size))
+                if not batch:
+                    break
                 
-                await self.chroma_memory.add_vector(
-                    id=f"{session_id}_{i}",
-                    text=chunk,
-                    metadata=metadata
-                )
+                ids, chunks, metadatas = zip(*batch)
+                if not await self.chroma_memory.add_vectors_batch(list(ids), list(chunks), list(metadatas)):
+                    raise RuntimeError(f"Failed to store vectors for session {session_id}")
                 
             return True
             
@@ -219,6 +490,34 @@ class MemoryAPI:
             logger.error(f"Failed to process and store vectors: {e}")
             raise
     
+    def _iter_chunk_rows(self, session_id: str, content: str, spans: List[tuple]) -> Iterator[tuple]:
+        """
+        Build the vector store rows for chunk spans, one at a time.
+        
+        Args:
+            session_id: Session ID to associate with vectors
+            content: The chunked content
+            spans: (start, end) chunk offsets into content
+            
+        Yields:
+            Tuples of (id, chunk text, metadata)
+        """
+        # start_offset lets readers drop hits that are just the overlap of a
+        # neighbouring chunk
+        prefix = session_id + "_"
+        total = len(spans)
+        for i, (start, end) in enumerate(spans):
+            yield (
+                prefix + str(i),
+                content[start:end].strip(),
+                {
+                    "session_id": session_id,
+                    "chunk_index": i,
+                    "total_chunks": total,
+                    "start_offset": start
+                }
+            )
+    
     async def search_vectors(self, query: str, limit: int = 5) -> List[Dict]:
         """
         Search for relevant vectors based on a query.
@@ -232,7 +531,7 @@ class MemoryAPI:
         """
         return await self.chroma_memory.search(query, limit)
     
-    async def get_relevant_memories(self, user_id: str, query: str, limit: int = 3) -> List[Dict]:
+    async def get_relevant_memories(self, user_id: int, query: str, limit: int = 3) -> List[Dict]:
         """
         Get relevant memories for a query.
         
@@ -251,17 +550,23 @@ class MemoryAPI:
             if not vector_results:
                 return []
             
-            # Get unique session IDs
-            session_ids = set()
+            # Overlapping chunks of one session often fill several hits; keep
+            # only the closest chunk per session. Hits without a session
+            # (not from a learning session) are skipped.
+            best = {}
             for result in vector_results:
-                if "metadata" in result and "session_id" in result["metadata"]:
-                    session_ids.add(result["metadata"]["session_id"])
+                session_id = (result.get("metadata") or {}).get("session_id")
+                if session_id is None:
+                    continue
+                if session_id not in best or result.get("distance", 1.0) < best[session_id].get("distance", 1.0):
+                    best[session_id] = result
+            
+            # Get session metadata for all hits, querying only the uncached ones
+            sessions = await self._get_sessions_by_ids(best)
             
-            # Get session metadata
             results_with_metadata = []
-            for result in vector_results:
-                session_id = result["metadata"]["session_id"]
-                session = await self.supabase_store.get_learning_session(session_id)
+            for session_id, result in best.items():
+                session = sessions.get(session_id)
                 
                 if session:
                     results_with_metadata.append({
@@ -277,9 +582,36 @@ class MemoryAPI:
             logger.error(f"Failed to get relevant memories: {e}")
             return []
     
+    async def _get_sessions_by_ids(self, session_ids) -> Dict[str, Dict]:
+        """
+        Get the names of learning sessions by ID, from the cache where possible.
+        
+        Args:
+            session_ids: Iterable of session IDs
+            
+        Returns:
+            Dictionary mapping session ID to {"id", "name"}, for the sessions found
+        """
+        sessions = {}
+        missing = []
+        for session_id in session_ids:
+            session = self._sessions_by_id.get(session_id)
+            if session is None:
+                missing.append(session_id)
+            else:
+                sessions[session_id] = session
+        
+        if missing:
+            # Only the name is shown next to a memory; skip the session content
+            fetched = await self.supabase_store.get_learning_sessions_by_ids(missing, columns="id,name")
+            self._sessions_by_id.update(fetched)
+            sessions.update(fetched)
+        
+        return sessions
+    
     # User preferences
     
-    async def get_user_preferences(self, user_id: str) -> Dict:
+    async def get_user_preferences(self, user_id: int) -> Dict:
         """
         Get user preferences.
         
@@ -289,9 +621,13 @@ class MemoryAPI:
         Returns:
             User preference dictionary
         """
-        return await self.supabase_store.get_user_preferences(user_id)
+        preferences = self._preferences.get(user_id)
+        if preferences is None:
+            preferences = await self.supabase_store.get_user_preferences(_uid_key(user_id))
+            self._preferences[user_id] = preferences
+        return preferences
     
-    async def update_user_preferences(self, user_id: str, preferences: Dict) -> bool:
+    async def update_user_preferences(self, user_id: int, preferences: Dict) -> bool:
         """
         Update user preferences.
         
@@ -302,54 +638,119 @@ class MemoryAPI:
         Returns:
             True if successful, False otherwise
         """
-        return await self.supabase_store.update_user_preferences(user_id, preferences)
+        self._preferences.pop(user_id, None)
+        return await self.supabase_store.update_user_preferences(_uid_key(user_id), preferences)
     
     # Utility functions
     
-    def _chunk_text(self, text: str, chunk_size: int) -> List[str]:
+    def _chunk_text(self, text: str, chunk_size: int, stride: int = None) -> List[str]:
         """
-        Split text into chunks of approximately equal size.
+        Split text into overlapping chunks of approximately equal size.
         
         Args:
             text: Text to split
             chunk_size: Approximate chunk size in characters
+            stride: Distance between chunk starts (default: 3/4 of chunk_size)
             
         Returns:
             List of text chunks
         """
-        # Simple implementation - split by paragraphs first, then by sentences if needed
-        paragraphs = text.split("\n\n")
-        chunks = []
-        current_chunk = ""
+        return [text[start:end].strip() for start, end in self._chunk_spans(text, chunk_size, stride)]
+    
+    def _content_spans(self, content: str) -> List[tuple]:
+        """
+        Compute chunk boundaries for learned content with the configured budget.
         
-        for paragraph in paragraphs:
-            if len(current_chunk) + len(paragraph) <= chunk_size:
-                current_chunk += paragraph + "\n\n"
-            else:
-                # If current chunk is not empty, add it to chunks
-                if current_chunk:
-                    chunks.append(current_chunk.strip())
-                
-                # If paragraph is larger than chunk_size, split it further
-                if len(paragraph) > chunk_size:
-                    sentences = paragraph.split(". ")
-                    current_chunk = ""
-                    
-                    for sentence in sentences:
-                        if len(current_chunk) + len(sentence) <= chunk_size:
-                            current_chunk += sentence + ". "
-                        else:
-                            if current_chunk:
-                                chunks.append(current_chunk.strip())
-                            current_chunk = sentence + ". "
-                else:
-                    current_chunk = paragraph + "\n\n"
-        
-        # Add the last chunk if not empty
-        if current_chunk:
-            chunks.append(current_chunk.strip())
-        
-        return chunks
+        Args:
+            content: Content to split
+            
+        Returns:
+            List of (start, end) offsets into content
+        """
+        if self.chunk_tokenizer:
+            tokenizer = _load_tokenizer(self.chunk_tokenizer)
+            if tokenizer is not None:
+                return self._token_chunk_spans(tokenizer, content, self.chunk_tokens, self.chunk_token_stride)
+        
+        return self._chunk_spans(content, self.chunk_size, self.chunk_stride)
+    
+    def _token_chunk_spans(self, tokenizer, text: str, chunk_tokens: int, stride: int) -> List[tuple]:
+        """
+        Compute sliding-window chunk boundaries measured in tokens.
+        
+        The text is encoded once; windows of chunk_tokens tokens start every
+        stride tokens and are mapped back to character offsets, so each chunk
+        fits the embedding model's input exactly.
+        
+        Args:
+            tokenizer: tokenizers.Tokenizer
+            text: Text to split
+            chunk_tokens: Chunk size in tokens
+            stride: Distance between chunk starts in tokens
+            
+        Returns:
+            List of (start, end) offsets into text
+        """
+        stride = min(max(stride, 1), chunk_tokens)
+        
+        # Special tokens ([CLS], [SEP], ...) have empty offsets
+        offsets = [
+            offset for offset in tokenizer.encode(text, add_special_tokens=False).offsets
+            if offset[1] > offset[0]
+        ]
+        
+        spans = []
+        for first in range(0, len(offsets), stride):
+            last = min(first + chunk_tokens, len(offsets)) - 1
+            spans.append((offsets[first][0], offsets[last][1]))
+            if last == len(offsets) - 1:
+                break
+        
+        return spans
+    
+    def _chunk_spans(self, text: str, chunk_size: int, stride: int = None) -> List[tuple]:
+        """
+        Compute sliding-window chunk boundaries.
+        
+        Windows of chunk_size characters start every stride characters, so
+        consecutive chunks overlap by chunk_size - stride and a passage cut by
+        one boundary is whole in the neighbouring chunk. Boundaries are moved
+        to the nearest paragraph or sentence break within a tenth of
+        chunk_size.
+        
+        Args:
+            text: Text to split
+            chunk_size: Approximate chunk size in characters
+            stride: Distance between chunk starts (default: 3/4 of chunk_size)
+            
+        Returns:
+            List of (start, end) offsets into text
+        """
+        stride = min(max(stride or int(0.75 * chunk_size), 1), chunk_size)
+        tolerance = chunk_size // 10
+        length = len(text)
+        
+        if _COMPILED_CHUNKER and length >= _COMPILED_CHUNKER_MIN_LENGTH:
+            return _kernels.chunk_offsets(text, chunk_size, stride, tolerance)
+        
+        spans = []
+        start = 0
+        
+        while start < length:
+            end = min(start + chunk_size, length)
+            if end < length:
+                end = _snap_end(text, end, max(start + 1, end - tolerance))
+            
+            if _NON_SPACE.search(text, start, end):
+                spans.append((start, end))
+            
+            if end >= length:
+                break
+            
+            next_start = start + stride
+            start = max(_snap_start(text, next_start, min(length, next_start + tolerance)), start + 1)
+        
+        return spans
 
 
 async def setup_memory_systems(config):
@@ -11,12 +11,53 @@ This module implements relational data storage using Supabase.
 import logging
 from typing import Dict, List, Optional, Any
 import json
-from datetime import datetime
+from datetime import datetime, timedelta
 import uuid
 import asyncio
+import itertools
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+import httpx
+from cachetools import TTLCache
+from tenacity import AsyncRetrying, stop_after_attempt, wait_random_exponential, retry_if_exception_type
 
 logger = logging.getLogger(__name__)
 
+# orjson decodes settings blobs several times faster
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    logger.warning("orjson not installed, using the standard json module")
+    _json_loads = json.loads
+
+# Messages kept per user by the mock storage
+MOCK_HISTORY_LIMIT = 1000
+
+# Failures that happen before a request reaches the server, so retrying
+# can't apply a write twice
+_TRANSIENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+class SupabaseUnavailableError(ConnectionError):
+    """Raised without contacting Supabase while it is considered down."""
+
+def _decode_settings(settings) -> Dict:
+    """
+    Decode a user's settings column.
+    
+    The jsonb column comes back as a dict; rows written by older versions
+    hold a JSON-encoded string instead (see the migration in
+    docs/INTEGRATION_GUIDE.md).
+    """
+    if isinstance(settings, str):
+        return _json_loads(settings) if settings else {}
+    return settings or {}
+
+def _is_missing_function(error) -> bool:
+    """Check whether a PostgREST error means the called database function doesn't exist."""
+    return "PGRST202" in str(error) or "Could not find the function" in str(error)
+
 class SupabaseStore:
     """
     Supabase-based relational data storage.
@@ -35,8 +76,90 @@ class SupabaseStore:
         self.service_role_key = config["supabase"].get("service_role_key")
         self.client = None
         
+        # Current conversation session per user
+        self._session_ids = TTLCache(
+            maxsize=config["supabase"].get("session_cache_size", 4096),
+            ttl=config["supabase"].get("session_cache_ttl", 3600)
+        )
+        
+        # Database functions from docs/INTEGRATION_GUIDE.md; each one found
+        # missing is remembered, and only that one falls back to table requests
+        self.use_rpc = config["supabase"].get("use_rpc", True)
+        self._missing_rpcs = set()
+        
+        # supabase-py's client is synchronous; requests run on this pool so
+        # they don't block the event loop and concurrent ones overlap
+        self.max_workers = config["supabase"].get("max_workers", 16)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix="supabase"
+        )
+        
+        # Connection failures are retried with jittered backoff; after
+        # breaker_threshold requests fail in a row, requests fail fast for
+        # breaker_cooldown seconds instead of piling up on an outage
+        self.retry_attempts = config["supabase"].get("retry_attempts", 3)
+        self.breaker_threshold = config["supabase"].get("breaker_threshold", 5)
+        self.breaker_cooldown = config["supabase"].get("breaker_cooldown", 30)
+        self._consecutive_failures = 0
+        self._breaker_open_until = 0.0
+        
         logger.info("SupabaseStore initialized")
     
+    async def _execute(self, query):
+        """
+        Execute a Supabase query in the worker pool.
+        
+        Args:
+            query: Query builder to execute
+            
+        Returns:
+            The query response
+        """
+        return await self._execute_call(query.execute)
+    
+    async def _execute_call(self, func):
+        """
+        Run a blocking Supabase call in the worker pool.
+        
+        Connection failures are retried; while Supabase is considered down
+        the call fails immediately with SupabaseUnavailableError.
+        
+        Args:
+            func: Callable taking no arguments
+            
+        Returns:
+            The call's result
+        """
+        if time.monotonic() < self._breaker_open_until:
+            raise SupabaseUnavailableError("Supabase is unavailable, request skipped")
+        
+        loop = asyncio.get_running_loop()
+        
+        try:
+            async for attempt in AsyncRetrying(
+                stop=stop_after_attempt(self.retry_attempts),
+                wait=wait_random_exponential(multiplier=0.1, max=2),
+                retry=retry_if_exception_type(_TRANSIENT_ERRORS),
+                reraise=True
+            ):
+                with attempt:
+                    result = await loop.run_in_executor(self._executor, func)
+        except _TRANSIENT_ERRORS:
+            self._consecutive_failures += 1
+            if self._consecutive_failures >= self.breaker_threshold:
+                self._breaker_open_until = time.monotonic() + self.breaker_cooldown
+                logger.error(f"Supabase unreachable after {self._consecutive_failures} failed requests, "
+                             f"skipping requests for {self.breaker_cooldown}s")
+            raise
+        
+        self._consecutive_failures = 0
+        return result
+    
+    def _rpc_enabled(self, name: str) -> bool:
+        """Whether to call a database function rather than use table requests."""
+        return self.use_rpc and name not in self._missing_rpcs
+    
     async def initialize(self):
         """
         Initialize Supabase client and verify connection.
@@ -57,9 +180,10 @@ class SupabaseStore:
             
             # Initialize client
             self.client = create_client(self.url, self.anon_key)
+            self._pool_postgrest_session()
             
             # Test connection
-            test = self.client.table("test").select("*").limit(1).execute()
+            test = await self._execute(self.client.table("test").select("*").limit(1))
             logger.info("Supabase connection successful")
             
             return True
@@ -76,12 +200,50 @@ class SupabaseStore:
             self._setup_mock_storage()
             return True
     
+    def _pool_postgrest_session(self):
+        """
+        Replace the PostgREST HTTP session with one pooled for the worker threads.
+        
+        All table and RPC requests go through this one session, so every
+        worker reuses its kept-alive connections instead of reconnecting.
+        """
+        try:
+            postgrest = self.client.postgrest
+            session = postgrest.session
+            # Keep everything supabase-py configured; only the pool limits change
+            postgrest.session = httpx.Client(
+                base_url=session.base_url,
+                headers=session.headers,
+                timeout=session.timeout,
+                follow_redirects=session.follow_redirects,
+                limits=httpx.Limits(max_connections=self.max_workers, max_keepalive_connections=self.max_workers)
+            )
+            session.close()
+            
+        except Exception as e:
+            logger.warning(f"Could not configure the Supabase connection pool: {e}")
+    
+    async def close(self):
+        """Close the Supabase connections and worker pool."""
+        if self.client:
+            try:
+                loop = asyncio.get_running_loop()
+                await loop.run_in_executor(self._executor, self.client.postgrest.session.close)
+            except Exception as e:
+                logger.warning(f"Error closing Supabase session: {e}")
+        
+        self._executor.shutdown(wait=False)
+    
     def _setup_mock_storage(self):
         """Set up mock storage using dictionaries."""
         self.mock_users = {}
         self.mock_sessions = {}
-        self.mock_messages = []
+        
+        # Indexed by user so lookups don't scan every user's data; histories
+        # are kept in insertion (= timestamp) order and bounded
+        self.mock_messages = defaultdict(lambda: deque(maxlen=MOCK_HISTORY_LIMIT))
         self.mock_learning_sessions = {}
+        self.mock_learning_sessions_by_user = defaultdict(dict)
         logger.info("Mock storage initialized")
     
     # User management
@@ -96,9 +258,11 @@ class SupabaseStore:
         Returns:
             User data dictionary
         """
+        timestamp = datetime.now().isoformat()
+        
         try:
             if self.client:
-                response = self.client.table("users").select("*").eq("id", user_id).execute()
+                response = await self._execute(self.client.table("users").select("*").eq("id", user_id))
                 
                 if response.data and len(response.data) > 0:
                     return response.data[0]
@@ -106,17 +270,17 @@ class SupabaseStore:
                     # Create user if not exists
                     new_user = {
                         "id": user_id,
-                        "settings": json.dumps({"created_at": datetime.now().isoformat()})
+                        "settings": {"created_at": timestamp}
                     }
-                    self.client.table("users").insert(new_user).execute()
+                    await self._execute(self.client.table("users").insert(new_user))
                     return new_user
             else:
                 # Mock implementation
                 if user_id not in self.mock_users:
                     self.mock_users[user_id] = {
                         "id": user_id,
-                        "settings": {"created_at": datetime.now().isoformat()},
-                        "created_at": datetime.now().isoformat()
+                        "settings": {"created_at": timestamp},
+                        "created_at": timestamp
                     }
                 return self.mock_users[user_id]
                 
@@ -127,7 +291,7 @@ class SupabaseStore:
             return {
                 "id": user_id,
                 "settings": {},
-                "created_at": datetime.now().isoformat()
+                "created_at": timestamp
             }
     
     async def get_user_preferences(self, user_id: str) -> Dict:
@@ -141,11 +305,7 @@ class SupabaseStore:
             User preferences dictionary
         """
         user = await self.get_user(user_id)
-        
-        if self.client:
-            return json.loads(user.get("settings", "{}"))
-        else:
-            return user.get("settings", {})
+        return _decode_settings(user.get("settings"))
     
     async def update_user_preferences(self, user_id: str, preferences: Dict) -> bool:
         """
@@ -159,19 +319,32 @@ class SupabaseStore:
             True if successful
         """
         try:
-            user = await self.get_user(user_id)
-            
             if self.client:
-                current_settings = json.loads(user.get("settings", "{}"))
+                if self._rpc_enabled("merge_user_settings"):
+                    try:
+                        # Merged in the database: no read round-trip, and
+                        # concurrent updates can't overwrite each other
+                        await self._execute(self.client.rpc("merge_user_settings", {
+                            "p_user_id": user_id,
+                            "p_settings": preferences
+                        }))
+                        return True
+                    except Exception as e:
+                        if not _is_missing_function(e):
+                            raise
+                        logger.warning(f"merge_user_settings RPC unavailable, using table requests: {e}")
+                        self._missing_rpcs.add("merge_user_settings")
+                
+                user = await self.get_user(user_id)
+                current_settings = _decode_settings(user.get("settings"))
                 updated_settings = {**current_settings, **preferences}
                 
-                self.client.table("users").update({
-                    "settings": json.dumps(updated_settings)
-                }).eq("id", user_id).execute()
+                await self._execute(self.client.table("users").update({
+                    "settings": updated_settings
+                }).eq("id", user_id))
             else:
                 # Mock implementation
-                if user_id not in self.mock_users:
-                    await self.get_user(user_id)
+                await self.get_user(user_id)
                     
                 current_settings = self.mock_users[user_id].get("settings", {})
                 self.mock_users[user_id]["settings"] = {**current_settings, **preferences}
@@ -184,6 +357,46 @@ class SupabaseStore:
     
     # Conversation history
     
+    async def _get_session_id(self, user_id: str, create: bool = True) -> Optional[str]:
+        """
+        Get the ID of a user's current conversation session.
+        
+        The latest session only changes when one is created, so the ID is
+        cached and the lookup query only runs once per user per TTL.
+        
+        Args:
+            user_id: User ID
+            create: Create a session if the user has none
+            
+        Returns:
+            Session ID, or None if the user has none and create is False
+        """
+        session_id = self._session_ids.get(user_id)
+        if session_id is not None:
+            return session_id
+        
+        # Get latest session for user
+        session_response = await self._execute(self.client.table("sessions").select("id").eq("user_id", user_id).order("created_at", desc=True).limit(1))
+        
+        if session_response.data:
+            session_id = session_response.data[0]["id"]
+        elif create:
+            # Create new session
+            session_id = str(uuid.uuid4())
+            timestamp = datetime.now().isoformat()
+            await self._execute(self.client.table("sessions").insert({
+                "id": session_id,
+                "user_id": user_id,
+                "name": "New conversation",
+                "created_at": timestamp,
+                "updated_at": timestamp
+            }))
+        else:
+            return None
+        
+        self._session_ids[user_id] = session_id
+        return session_id
+    
     async def get_conversation_history(self, user_id: str, limit: int = 10) -> List[Dict]:
         """
         Get conversation history for a user.
@@ -197,31 +410,17 @@ class SupabaseStore:
         """
         try:
             if self.client:
-                # Get latest session for user
-                session_response = self.client.table("sessions").select("id").eq("user_id", user_id).order("created_at", desc=True).limit(1).execute()
-                
-                if not session_response.data:
-                    # Create new session
-                    session_id = str(uuid.uuid4())
-                    self.client.table("sessions").insert({
-                        "id": session_id,
-                        "user_id": user_id,
-                        "name": "New conversation",
-                        "created_at": datetime.now().isoformat(),
-                        "updated_at": datetime.now().isoformat()
-                    }).execute()
-                else:
-                    session_id = session_response.data[0]["id"]
+                session_id = await self._get_session_id(user_id)
                 
                 # Get messages for session
-                messages_response = self.client.table("messages").select("*").eq("session_id", session_id).order("timestamp", desc=True).limit(limit).execute()
+                messages_response = await self._execute(self.client.table("messages").select("role,content,timestamp").eq("session_id", session_id).order("timestamp", desc=True).limit(limit))
                 
                 # Reverse to get chronological order
                 return list(reversed(messages_response.data))
             else:
                 # Mock implementation
-                user_messages = [msg for msg in self.mock_messages if msg.get("user_id") == user_id]
-                return sorted(user_messages[-limit:], key=lambda x: x.get("timestamp", ""))
+                user_messages = self.mock_messages.get(user_id, ())
+                return list(itertools.islice(user_messages, max(len(user_messages) - limit, 0), None))
                 
         except Exception as e:
             logger.error(f"Error getting conversation history: {e}")
@@ -239,56 +438,97 @@ class SupabaseStore:
         Returns:
             True if successful
         """
-        try:
-            timestamp = datetime.now().isoformat()
+        return await self.add_messages_batch(user_id, [{"role": role, "content": content}])
+    
+    async def add_messages_batch(self, user_id: str, messages: List[Dict]) -> bool:
+        """
+        Add several messages to conversation history in one write.
+        
+        Args:
+            user_id: User ID
+            messages: List of {"role", "content"} dictionaries, in order, with
+                an optional "timestamp" (default: now)
             
+        Returns:
+            True if successful
+        """
+        if not messages:
+            return True
+        
+        # History is ordered by timestamp, so messages stamped here get
+        # consecutive microseconds
+        now = datetime.now()
+        messages = [
+            message if message.get("timestamp") else {
+                **message, "timestamp": (now + timedelta(microseconds=i)).isoformat()
+            }
+            for i, message in enumerate(messages)
+        ]
+        
+        try:
             if self.client:
-                # Get latest session for user
-                session_response = self.client.table("sessions").select("id").eq("user_id", user_id).order("created_at", desc=True).limit(1).execute()
+                if self._rpc_enabled("add_messages"):
+                    try:
+                        # Session lookup/creation and the inserts in one round-trip
+                        await self._execute(self.client.rpc("add_messages", {
+                            "p_user_id": user_id,
+                            "p_messages": messages
+                        }))
+                        return True
+                    except Exception as e:
+                        if not _is_missing_function(e):
+                            raise
+                        logger.warning(f"add_messages RPC unavailable, using table requests: {e}")
+                        self._missing_rpcs.add("add_messages")
                 
-                if not session_response.data:
-                    # Create new session
-                    session_id = str(uuid.uuid4())
-                    self.client.table("sessions").insert({
-                        "id": session_id,
-                        "user_id": user_id,
-                        "name": "New conversation",
-                        "created_at": timestamp,
-                        "updated_at": timestamp
-                    }).execute()
-                else:
-                    session_id = session_response.data[0]["id"]
-                    # Update session timestamp
-                    self.client.table("sessions").update({
-                        "updated_at": timestamp
-                    }).eq("id", session_id).execute()
-                
-                # Add message
-                message_id = str(uuid.uuid4())
-                self.client.table("messages").insert({
-                    "id": message_id,
-                    "session_id": session_id,
-                    "role": role,
-                    "content": content,
-                    "timestamp": timestamp
-                }).execute()
+                await self._add_messages_by_table(user_id, messages)
             else:
                 # Mock implementation
-                message_id = str(uuid.uuid4())
-                self.mock_messages.append({
-                    "id": message_id,
-                    "user_id": user_id,
-                    "role": role,
-                    "content": content,
-                    "timestamp": timestamp
-                })
+                self.mock_messages[user_id].extend(
+                    {
+                        "id": str(uuid.uuid4()),
+                        "user_id": user_id,
+                        "role": message["role"],
+                        "content": message["content"],
+                        "timestamp": message["timestamp"]
+                    }
+                    for message in messages
+                )
                 
             return True
             
         except Exception as e:
-            logger.error(f"Error adding message to history: {e}")
+            logger.error(f"Error adding messages to history: {e}")
             return False
     
+    async def _add_messages_by_table(self, user_id: str, messages: List[Dict]):
+        """
+        Add messages with plain table requests, for databases without the RPC functions.
+        
+        Args:
+            user_id: User ID
+            messages: List of {"role", "content", "timestamp"} dictionaries, in order
+        """
+        timestamp = messages[-1]["timestamp"]
+        session_id = await self._get_session_id(user_id)
+        
+        # Update session timestamp
+        await self._execute(self.client.table("sessions").update({
+            "updated_at": timestamp
+        }).eq("id", session_id))
+        
+        # Add all messages in one request
+        await self._execute(self.client.table("messages").insert([
+            {
+                "id": str(uuid.uuid4()),
+                "session_id": session_id,
+                "role": message["role"],
+                "content": message["content"],
+                "timestamp": message["timestamp"]
+            }
+            for message in messages
+        ]))
+    
     async def clear_conversation_history(self, user_id: str) -> bool:
         """
         Clear conversation history for a user.
@@ -301,22 +541,33 @@ class SupabaseStore:
         """
         try:
             if self.client:
-                # Get latest session for user
-                session_response = self.client.table("sessions").select("id").eq("user_id", user_id).order("created_at", desc=True).limit(1).execute()
+                # Look the session up again afterwards, in case another bot
+                # process has started a new one
+                self._session_ids.pop(user_id, None)
                 
-                if session_response.data:
-                    session_id = session_response.data[0]["id"]
-                    
+                if self._rpc_enabled("clear_messages"):
+                    try:
+                        await self._execute(self.client.rpc("clear_messages", {"p_user_id": user_id}))
+                        return True
+                    except Exception as e:
+                        if not _is_missing_function(e):
+                            raise
+                        logger.warning(f"clear_messages RPC unavailable, using table requests: {e}")
+                        self._missing_rpcs.add("clear_messages")
+                
+                session_id = await self._get_session_id(user_id, create=False)
+                
+                if session_id:
                     # Delete messages for session
-                    self.client.table("messages").delete().eq("session_id", session_id).execute()
+                    await self._execute(self.client.table("messages").delete().eq("session_id", session_id))
                     
                     # Update session timestamp
-                    self.client.table("sessions").update({
+                    await self._execute(self.client.table("sessions").update({
                         "updated_at": datetime.now().isoformat()
-                    }).eq("id", session_id).execute()
+                    }).eq("id", session_id))
             else:
                 # Mock implementation
-                self.mock_messages = [msg for msg in self.mock_messages if msg.get("user_id") != user_id]
+                self.mock_messages.pop(user_id, None)
                 
             return True
             
@@ -327,7 +578,8 @@ class SupabaseStore:
     # Learning sessions
     
     async def create_learning_session(self, user_id: str, name: str, content: str, 
-                                    description: str = None, source: str = None) -> str:
+                                    description: str = None, source: str = None,
+                                    session_id: str = None) -> str:
         """
         Create a new learning session.
         
@@ -337,12 +589,13 @@ class SupabaseStore:
             content: Session content
             description: Optional description
             source: Optional source (like URL)
+            session_id: Optional pre-allocated session ID (default: a new UUID)
             
         Returns:
             Session ID if successful
         """
         try:
-            session_id = str(uuid.uuid4())
+            session_id = session_id or str(uuid.uuid4())
             timestamp = datetime.now().isoformat()
             
             session_data = {
@@ -357,10 +610,11 @@ class SupabaseStore:
             }
             
             if self.client:
-                self.client.table("learning_sessions").insert(session_data).execute()
+                await self._execute(self.client.table("learning_sessions").insert(session_data))
             else:
                 # Mock implementation
                 self.mock_learning_sessions[session_id] = session_data
+                self.mock_learning_sessions_by_user[user_id][session_id] = session_data
                 
             return session_id
             
@@ -380,7 +634,7 @@ class SupabaseStore:
         """
         try:
             if self.client:
-                response = self.client.table("learning_sessions").select("*").eq("id", session_id).execute()
+                response = await self._execute(self.client.table("learning_sessions").select("*").eq("id", session_id))
                 
                 if response.data and len(response.data) > 0:
                     return response.data[0]
@@ -394,6 +648,50 @@ class SupabaseStore:
             logger.error(f"Error getting learning session: {e}")
             return None
     
+    async def get_learning_sessions_by_ids(self, session_ids: List[str], columns: str = "*") -> Dict[str, Dict]:
+        """
+        Get several learning sessions by ID in one query.
+        
+        Args:
+            session_ids: Session IDs
+            columns: Comma-separated columns to fetch (must include "id")
+            
+        Returns:
+            Dictionary mapping session ID to session, for the sessions found
+        """
+        if not session_ids:
+            return {}
+        
+        try:
+            if self.client:
+                response = await self._execute(self.client.table("learning_sessions").select(columns).in_("id", session_ids))
+                return {session["id"]: session for session in response.data or []}
+            else:
+                # Mock implementation
+                fields = None if columns == "*" else columns.split(",")
+                return {
+                    session_id: (
+                        self.mock_learning_sessions[session_id] if fields is None
+                        else {field: self.mock_learning_sessions[session_id].get(field) for field in fields}
+                    )
+                    for session_id in session_ids
+                    if session_id in self.mock_learning_sessions
+                }
+                
+        except Exception as e:
+            logger.warning(f"Batched learning session fetch failed, fetching individually: {e}")
+            
+            # Fall back to one query per session, issued concurrently
+            sessions = await asyncio.gather(
+                *(self.get_learning_session(session_id) for session_id in session_ids),
+                return_exceptions=True
+            )
+            return {
+                session_id: session
+                for session_id, session in zip(session_ids, sessions)
+                if session and not isinstance(session, BaseException)
+            }
+    
     async def get_learning_session_by_name(self, user_id: str, name: str) -> Dict:
         """
         Get a learning session by name.
@@ -407,7 +705,7 @@ class SupabaseStore:
         """
         try:
             if self.client:
-                response = self.client.table("learning_sessions").select("*").eq("user_id", user_id).eq("name", name).execute()
+                response = await self._execute(self.client.table("learning_sessions").select("*").eq("user_id", user_id).eq("name", name))
                 
                 if response.data and len(response.data) > 0:
                     return response.data[0]
@@ -415,8 +713,8 @@ class SupabaseStore:
                     return None
             else:
                 # Mock implementation
-                for session in self.mock_learning_sessions.values():
-                    if session.get("user_id") == user_id and session.get("name") == name:
+                for session in self.mock_learning_sessions_by_user.get(user_id, {}).values():
+                    if session.get("name") == name:
                         return session
                 return None
                 
@@ -424,32 +722,42 @@ class SupabaseStore:
             logger.error(f"Error getting learning session by name: {e}")
             return None
     
-    async def list_learning_sessions(self, user_id: str) -> List[Dict]:
+    async def list_learning_sessions(self, user_id: str, limit: int = None, offset: int = 0) -> List[Dict]:
         """
-        List all learning sessions for a user.
+        List learning sessions for a user, newest first.
         
         Args:
             user_id: User ID
+            limit: Optional maximum number of sessions to return
+            offset: Number of sessions to skip, when limit is given
             
         Returns:
             List of session dictionaries
         """
         try:
             if self.client:
-                response = self.client.table("learning_sessions").select("id,name,description,created_at").eq("user_id", user_id).order("created_at", desc=True).execute()
+                query = self.client.table("learning_sessions").select("id,name,description,created_at").eq("user_id", user_id).order("created_at", desc=True)
+                if limit is not None:
+                    query = query.range(offset, offset + limit - 1)
+                
+                response = await self._execute(query)
                 return response.data
             else:
                 # Mock implementation
-                return [
-                    {
-                        "id": session_id,
-                        "name": session.get("name"),
-                        "description": session.get("description"),
-                        "created_at": session.get("created_at")
-                    }
-                    for session_id, session in self.mock_learning_sessions.items()
-                    if session.get("user_id") == user_id
-                ]
+                sessions = sorted(
+                    (
+                        {
+                            "id": session_id,
+                            "name": session.get("name"),
+                            "description": session.get("description"),
+                            "created_at": session.get("created_at")
+                        }
+                        for session_id, session in self.mock_learning_sessions_by_user.get(user_id, {}).items()
+                    ),
+                    key=lambda session: session["created_at"] or "",
+                    reverse=True
+                )
+                return sessions if limit is None else sessions[offset:offset + limit]
                 
         except Exception as e:
             logger.error(f"Error listing learning sessions: {e}")
@@ -467,11 +775,12 @@ class SupabaseStore:
         """
         try:
             if self.client:
-                self.client.table("learning_sessions").delete().eq("id", session_id).execute()
+                await self._execute(self.client.table("learning_sessions").delete().eq("id", session_id))
             else:
                 # Mock implementation
-                if session_id in self.mock_learning_sessions:
-                    del self.mock_learning_sessions[session_id]
+                session = self.mock_learning_sessions.pop(session_id, None)
+                if session is not None:
+                    self.mock_learning_sessions_by_user[session.get("user_id")].pop(session_id, None)
                     
             return True
             
@@ -494,7 +803,7 @@ class SupabaseStore:
             updates["updated_at"] = datetime.now().isoformat()
             
             if self.client:
-                self.client.table("learning_sessions").update(updates).eq("id", session_id).execute()
+                await self._execute(self.client.table("learning_sessions").update(updates).eq("id", session_id))
             else:
                 # Mock implementation
                 if session_id in self.mock_learning_sessions:
@@ -10,16 +10,125 @@ This module handles web scraping to extract content from URLs.
 
 import logging
 import asyncio
+import hashlib
+import multiprocessing
+import os
 import re
-import requests
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+import httpx
+from cachetools import LRUCache
 from bs4 import BeautifulSoup
 from urllib.parse import urlparse
 
 logger = logging.getLogger(__name__)
 
+# selectolax's C parser is several times faster than BeautifulSoup + lxml
+try:
+    from selectolax.lexbor import LexborHTMLParser
+    SELECTOLAX_AVAILABLE = True
+except ImportError:
+    logger.warning("selectolax not installed, parsing web pages with BeautifulSoup")
+    SELECTOLAX_AVAILABLE = False
+
+# Elements that never hold the main content
+_UNWANTED_TAGS = ['script', 'style', 'nav', 'footer', 'aside', 'head', 'header', 'noscript', 'iframe']
+
+# Browser-like headers to avoid being blocked
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5',
+    'Upgrade-Insecure-Requests': '1',
+    'Cache-Control': 'max-age=0',
+}
+
+# Largest page body that is downloaded; bigger pages are refused
+MAX_PAGE_BYTES = 5_000_000
+
+# Common ids and classes of main content containers
+_CONTENT_IDS = ['content', 'main-content', 'article', 'post', 'entry', 'blog-post']
+_CONTENT_CLASSES = ['content', 'article', 'post', 'entry', 'blog-post', 'story']
+
+_CONTENT_ID_RES = [re.compile(f'^{content_id}', re.I) for content_id in _CONTENT_IDS]
+_CONTENT_CLASS_RES = [re.compile(f'^{content_class}', re.I) for content_class in _CONTENT_CLASSES]
+
+# One selector for every possible candidate, so the tree is walked once by
+# the parser's selector engine. [class*=...] also matches classes that only
+# contain a name; _container_keys makes the exact per-class check.
+_MAIN_SELECTOR = ', '.join(
+    ['article', 'main']
+    + [f'[id^="{content_id}" i]' for content_id in _CONTENT_IDS]
+    + [f'[class*="{content_class}" i]' for content_class in _CONTENT_CLASSES]
+)
+
+# Text cleanup patterns
+_RE_BLANK_LINES = re.compile(r'\n\s*\n')
+_RE_SPACES = re.compile(r' +')
+_RE_SENTENCE_END = re.compile(r'([.!?])\s')
+
+# Recently scraped pages, revalidated with ETag / Last-Modified on reuse
+_CachedPage = namedtuple('_CachedPage', ['etag', 'last_modified', 'digest', 'text'])
+_scrape_cache = LRUCache(maxsize=256)
+
+# Shared client so concurrent and repeated fetches reuse pooled connections;
+# created on first use, inside the running event loop
+_client = None
+
+def _get_client():
+    """
+    Get the shared HTTP client, creating it on first use.
+    
+    Returns:
+        httpx.AsyncClient instance
+    """
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            headers=HEADERS,
+            timeout=10,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=20)
+        )
+    return _client
+
+# Worker processes for HTML parsing, which is CPU-bound and holds the GIL;
+# created on first use so importing the module doesn't start them. Pages
+# are scraped one per /learn, so a few workers are plenty
+MAX_PARSE_WORKERS = min(4, os.cpu_count() or 1)
+_parse_pool = None
+
+def _get_parse_pool():
+    """
+    Get the HTML parsing process pool, creating it on first use.
+    
+    Returns:
+        ProcessPoolExecutor instance
+    """
+    global _parse_pool
+    if _parse_pool is None:
+        # The bot already runs threads (Supabase pool, to_thread workers),
+        # and forking a threaded process can deadlock the children
+        start_method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+        _parse_pool = ProcessPoolExecutor(
+            max_workers=MAX_PARSE_WORKERS,
+            mp_context=multiprocessing.get_context(start_method)
+        )
+    return _parse_pool
+
+async def close():
+    """Close the shared HTTP client and the parsing process pool."""
+    global _client, _parse_pool
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+    if _parse_pool is not None:
+        _parse_pool.shutdown(wait=False, cancel_futures=True)
+        _parse_pool = None
+
 async def scrape_webpage(url):
     """
-    Scrape content from a webpage.
+    Scrape content from a webpage without blocking the event loop.
     
     Args:
         url: URL to scrape
@@ -33,44 +142,45 @@ async def scrape_webpage(url):
         if not parsed_url.scheme or not parsed_url.netloc:
             raise ValueError(f"Invalid URL: {url}")
         
-        # Add user agent to avoid being blocked
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.5',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1',
-            'Cache-Control': 'max-age=0',
-        }
+        # Revalidate a cached result instead of downloading the page again
+        cached = _scrape_cache.get(url)
+        headers = {}
+        if cached is not None:
+            if cached.etag:
+                headers['If-None-Match'] = cached.etag
+            if cached.last_modified:
+                headers['If-Modified-Since'] = cached.last_modified
         
         # Fetch the webpage
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
+        async with _get_client().stream('GET', url, headers=headers) as response:
+            if response.status_code == 304 and cached is not None:
+                return cached.text
+            
+            response.raise_for_status()
+            
+            # Check content type
+            content_type = response.headers.get('Content-Type', '')
+            if 'text/html' not in content_type.lower():
+                raise ValueError(f"URL does not contain HTML content: {content_type}")
+            
+            html = await _read_capped(response)
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
         
-        # Check content type
-        content_type = response.headers.get('Content-Type', '')
-        if 'text/html' not in content_type.lower():
-            raise ValueError(f"URL does not contain HTML content: {content_type}")
+        # Servers without validators often send the same page again
+        digest = hashlib.blake2b(html.encode('utf-8', errors='replace'), digest_size=16).digest()
+        if cached is not None and cached.digest == digest:
+            text = cached.text
+        else:
+            # HTML parsing is CPU-bound, so run it in a worker process; pages
+            # scraped concurrently are parsed on separate cores
+            loop = asyncio.get_running_loop()
+            text = await loop.run_in_executor(_get_parse_pool(), parse_webpage, html, url)
         
-        # Parse with BeautifulSoup
-        soup = BeautifulSoup(response.text, 'lxml')
+        _scrape_cache[url] = _CachedPage(etag, last_modified, digest, text)
+        return text
         
-        # Remove unwanted elements
-        for element in soup(['script', 'style', 'nav', 'footer', 'aside', 'head', 'header', 'noscript', 'iframe']):
-            element.decompose()
-        
-        # Find the main content
-        main_content = extract_main_content(soup, url)
-        
-        # Clean and format the text
-        cleaned_text = clean_text(main_content)
-        
-        # Add source information
-        cleaned_text += f"\n\nSource: {url}"
-        
-        return cleaned_text
-        
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         logger.error(f"Error fetching URL {url}: {e}")
         raise ValueError(f"Failed to fetch URL: {e}")
         
@@ -78,6 +188,68 @@ async def scrape_webpage(url):
         logger.error(f"Error scraping webpage {url}: {e}")
         raise
 
+async def _read_capped(response):
+    """
+    Read a streamed response body, refusing pages over MAX_PAGE_BYTES.
+    
+    Args:
+        response: Streamed httpx response
+        
+    Returns:
+        Decoded body text
+    """
+    content_length = response.headers.get('Content-Length')
+    if content_length and content_length.isdigit() and int(content_length) > MAX_PAGE_BYTES:
+        raise ValueError(f"Page is too large ({int(content_length)} bytes)")
+    
+    chunks = []
+    total = 0
+    async for chunk in response.aiter_bytes(65536):
+        total += len(chunk)
+        if total > MAX_PAGE_BYTES:
+            raise ValueError(f"Page is too large (over {MAX_PAGE_BYTES} bytes)")
+        chunks.append(chunk)
+    
+    return b''.join(chunks).decode(response.encoding or 'utf-8', errors='replace')
+
+def parse_webpage(html, url):
+    """
+    Extract the readable content from a webpage's HTML.
+    
+    Args:
+        html: Page HTML
+        url: Page URL
+        
+    Returns:
+        Extracted text content
+    """
+    if SELECTOLAX_AVAILABLE:
+        tree = LexborHTMLParser(html)
+        
+        # Remove unwanted elements
+        for node in tree.css(', '.join(_UNWANTED_TAGS)):
+            node.decompose()
+        
+        main_content = _extract_main_content_lexbor(tree)
+    else:
+        # Parse with BeautifulSoup
+        soup = BeautifulSoup(html, 'lxml')
+        
+        # Remove unwanted elements
+        for element in soup(_UNWANTED_TAGS):
+            element.decompose()
+        
+        # Find the main content
+        main_content = extract_main_content(soup, url)
+    
+    # Clean and format the text
+    cleaned_text = clean_text(main_content)
+    
+    # Add source information
+    cleaned_text += f"\n\nSource: {url}"
+    
+    return cleaned_text
+
 def extract_main_content(soup, url):
     """
     Extract the main content from a BeautifulSoup object.
@@ -89,34 +261,23 @@ def extract_main_content(soup, url):
     Returns:
         Extracted main content text
     """
-    # Try common content containers
-    main_content_candidates = []
+    # Collect the common content containers with a single selector
+    candidates = []
+    found = set()
     
-    # Look for article element
-    article = soup.find('article')
-    if article:
-        main_content_candidates.append(article.get_text())
+    for tag in soup.select(_MAIN_SELECTOR):
+        tag_id = tag.get('id')
+        for key in _container_keys(tag.name, tag_id if isinstance(tag_id, str) else None, tag.get('class')):
+            if key == 'class' or key not in found:
+                found.add(key)
+                candidates.append(tag)
     
-    # Look for main element
-    main = soup.find('main')
-    if main:
-        main_content_candidates.append(main.get_text())
-    
-    # Look for common content div IDs
-    for content_id in ['content', 'main-content', 'article', 'post', 'entry', 'blog-post']:
-        content_div = soup.find(id=re.compile(f'^{content_id}', re.I))
-        if content_div:
-            main_content_candidates.append(content_div.get_text())
-    
-    # Look for common content div classes
-    for content_class in ['content', 'article', 'post', 'entry', 'blog-post', 'story']:
-        content_divs = soup.find_all(class_=re.compile(f'^{content_class}', re.I))
-        for div in content_divs:
-            main_content_candidates.append(div.get_text())
-    
-    # If we found any candidates, return the longest one
-    if main_content_candidates:
-        return max(main_content_candidates, key=len)
+    # If we found any candidates, return the longest one; only the winner's
+    # text is built
+    if candidates:
+        return _longest_candidate(
+            candidates, id, lambda tag: tag.parents, _text_length
+        ).get_text()
     
     # Fallback: get all paragraphs
     paragraphs = soup.find_all('p')
@@ -129,6 +290,126 @@ def extract_main_content(soup, url):
     # Last resort: get the body text
     return soup.get_text()
 
+def _extract_main_content_lexbor(tree):
+    """
+    Extract the main content from a selectolax tree.
+    
+    Uses the same candidates and fallbacks as extract_main_content.
+    
+    Args:
+        tree: LexborHTMLParser object
+        
+    Returns:
+        Extracted main content text
+    """
+    candidates = []
+    found = set()
+    
+    for node in tree.css(_MAIN_SELECTOR):
+        attributes = node.attributes
+        classes = (attributes.get('class') or '').split()
+        for key in _container_keys(node.tag, attributes.get('id'), classes):
+            if key == 'class' or key not in found:
+                found.add(key)
+                candidates.append(node)
+    
+    if candidates:
+        return _longest_candidate(
+            candidates, _lexbor_id, _lexbor_parents, lambda node: len(node.text())
+        ).text()
+    
+    # Fallback: get all paragraphs
+    paragraph_text = '\n\n'.join(node.text() for node in tree.css('p'))
+    
+    if paragraph_text and len(paragraph_text) > 100:
+        return paragraph_text
+    
+    # Last resort: get the body text
+    return tree.body.text() if tree.body is not None else tree.text()
+
+def _container_keys(name, tag_id, classes):
+    """
+    Classify an element as a main content container candidate.
+    
+    The first <article>, the first <main> and the first element matching
+    each content id are candidates, as is every element with a content class.
+    
+    Args:
+        name: Tag name
+        tag_id: id attribute, or None
+        classes: List of class names, or None
+        
+    Returns:
+        List of the candidate kinds the element matches: 'article', 'main',
+        ('id', index) or 'class'
+    """
+    keys = []
+    
+    if name in ('article', 'main'):
+        keys.append(name)
+    
+    if tag_id:
+        keys.extend(
+            ('id', index)
+            for index, content_id_re in enumerate(_CONTENT_ID_RES)
+            if content_id_re.search(tag_id)
+        )
+    
+    if classes and any(
+        content_class_re.search(tag_class)
+        for content_class_re in _CONTENT_CLASS_RES
+        for tag_class in classes
+    ):
+        keys.append('class')
+    
+    return keys
+
+def _longest_candidate(candidates, identity, parents, length):
+    """
+    Find the candidate with the longest text in one pass.
+    
+    A candidate's text contains the text of every element nested inside it,
+    so candidates within an already measured one can never be longer and
+    are skipped; each part of the page is measured at most once.
+    
+    Args:
+        candidates: Candidate elements in document order
+        identity: Function returning a hashable identity for an element
+        parents: Function returning an element's ancestors
+        length: Function returning the length of an element's text
+        
+    Returns:
+        The first candidate with the longest text
+    """
+    best, best_length = None, -1
+    measured = set()
+    
+    for candidate in candidates:
+        key = identity(candidate)
+        if key in measured or any(identity(parent) in measured for parent in parents(candidate)):
+            continue
+        measured.add(key)
+        
+        candidate_length = length(candidate)
+        if candidate_length > best_length:
+            best, best_length = candidate, candidate_length
+    
+    return best
+
+def _lexbor_id(node):
+    # Node wrappers are created per access, so compare the underlying node
+    return node.mem_id
+
+def _lexbor_parents(node):
+    parent = node.parent
+    while parent is not None:
+        yield parent
+        parent = parent.parent
+
+def _text_length(tag):
+    """Length of a tag's get_text() without building the string."""
+    return sum(len(string) for string in tag.strings)
+
 def clean_text(text):
     """
     Clean and format extracted text.
@@ -140,15 +421,15 @@ def clean_text(text):
         Cleaned text
     """
     # Replace multiple newlines with double newlines
-    text = re.sub(r'\n\s*\n', '\n\n', text)
+    text = _RE_BLANK_LINES.sub('\n\n', text)
     
     # Replace multiple spaces with single space
-    text = re.sub(r' +', ' ', text)
+    text = _RE_SPACES.sub(' ', text)
     
     # Remove lines that are just whitespace
     text = '\n'.join(line for line in text.split('\n') if line.strip())
     
     # Try to preserve paragraphs
-    text = re.sub(r'([.!?])\s', r'\1\n\n', text)
+    text = _RE_SENTENCE_END.sub(r'\1\n\n', text)
     
     return text.strip()